@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Category, InventoryItem, InventoryLog, Supplier, InventoryItemSupplier
+from .models import (
+    Category, InventoryItem, InventoryLog, InventorySnapshot, Supplier, InventoryItemSupplier, LowStockAlert
+)
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('id','name', 'created_at', 'updated_at')
@@ -18,22 +20,11 @@ class InventoryItemSupplierInline(admin.TabularInline):
     extra = 1
 
 class InventoryItemAdmin(admin.ModelAdmin):
-    list_display = ('id','name', 'category', 'quantity', 'price', 'owner', 'stock_level', 'date_added', 'last_updated')
-    list_filter = ('category', 'owner')
+    list_display = ('id','name', 'category', 'quantity', 'price', 'owner', 'stock_status', 'date_added', 'last_updated')
+    list_filter = ('category', 'owner', 'stock_status')
     search_fields = ('name', 'description', 'category__name')
     inlines = [InventoryLogInline, InventoryItemSupplierInline]
-    
-    def stock_level(self, obj):
-        if obj.quantity <= 0:
-            return "Out of Stock"
-        elif obj.quantity < 20:
-            return "Low Stock"
-        elif obj.quantity < 50:
-            return "Medium Stock"
-        else:
-            return "In Stock"
-    stock_level.short_description = 'Stock Level'
-     
+
 admin.site.register(InventoryItem, InventoryItemAdmin)
 
 class InventoryLogAdmin(admin.ModelAdmin):
@@ -52,4 +43,17 @@ class InventoryItemSupplierAdmin(admin.ModelAdmin):
     list_display = ('id','item', 'supplier', 'supplier_sku', 'supplier_price', 'lead_time_days')
     list_filter = ('supplier',)
     search_fields = ('item__name', 'supplier__name', 'supplier_sku')
-admin.site.register(InventoryItemSupplier, InventoryItemSupplierAdmin)
\ No newline at end of file
+admin.site.register(InventoryItemSupplier, InventoryItemSupplierAdmin)
+
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ('id', 'item', 'owner', 'quantity', 'threshold', 'created_at', 'sent_at', 'resolved_at')
+    list_filter = ('owner',)
+    readonly_fields = ('item', 'owner', 'quantity', 'threshold', 'created_at', 'sent_at', 'resolved_at')
+admin.site.register(LowStockAlert, LowStockAlertAdmin)
+
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ('item', 'date', 'quantity', 'value')
+    list_filter = ('date',)
+    search_fields = ('item__name', 'item__sku')
+    readonly_fields = ('item', 'date', 'quantity', 'value')
+admin.site.register(InventorySnapshot, InventorySnapshotAdmin)
@@ -0,0 +1,167 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Sum, Value
+from django.db.models.functions import Abs, Coalesce, TruncDate
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import InventoryItemSupplier, InventoryLog
+from .snapshots import day_start
+
+DEFAULT_LEAD_TIME_DAYS = 7
+
+# Days of demand an order should cover beyond the reorder point
+REVIEW_DAYS = 30
+
+RECENT_DAYS = 7
+
+# z-score for a 95% chance of not running out during the lead time
+SERVICE_LEVEL_Z = 1.65
+
+MAX_WINDOW_DAYS = 365
+
+
+def columns(rows, *dtypes):
+    """
+    Split query rows into one NumPy array per column.
+    """
+    values = list(zip(*rows)) or [()] * len(dtypes)
+    return [np.array(column, dtype=dtype) for column, dtype in zip(values, dtypes)]
+
+
+def parse_window_days(value, default=30):
+    if not value:
+        return default
+    try:
+        days = int(value)
+    except ValueError:
+        days = 0
+    if not 1 <= days <= MAX_WINDOW_DAYS:
+        raise ValidationError({'days': f'Enter a whole number of days from 1 to {MAX_WINDOW_DAYS}.'})
+    return days
+
+
+class StockAnalysis:
+    """
+    Consumption and reorder figures for a set of items, computed over the
+    REMOVE log history of the last `days` complete days. The log is reduced to
+    one row per item and day in SQL and everything after that is array maths,
+    so no model instances are built however long the history is.
+
+    Arrays are aligned with `item_ids` (ascending):
+
+    - daily_consumption: mean units removed per day over the window
+    - recent_consumption: the same over the last RECENT_DAYS days
+    - days_of_cover: quantity / daily_consumption (inf when nothing is used)
+    - reorder_point: expected use over the lead time plus safety stock for
+      the day-to-day variation, and never below the item's threshold
+    - reorder_quantity: what brings stock back to the reorder point plus
+      REVIEW_DAYS of use, for items at or below their reorder point
+    """
+    def __init__(self, items, days=30, today=None):
+        self.days = days
+        self.end = day_start(today or timezone.localdate())
+        self.start = self.end - timedelta(days=days)
+
+        self.item_ids, self.quantity, self.threshold = columns(
+            items.order_by('id').values_list('id', 'quantity', 'low_stock_threshold'),
+            np.int64, np.int64, np.int64
+        )
+        self.items = items
+        self.load_consumption()
+        self.load_suppliers()
+        self.compute()
+
+    def positions(self, ids):
+        return np.searchsorted(self.item_ids, ids)
+
+    def load_consumption(self):
+        rows = InventoryLog.objects.filter(
+            item__in=self.items.order_by(), action='REMOVE', timestamp__gte=self.start, timestamp__lt=self.end
+        ).order_by().annotate(day=TruncDate('timestamp')).values('item_id', 'day').annotate(
+            used=Sum(Abs('quantity_change'))
+        ).values_list('item_id', 'day', 'used')
+        item_ids, days, used = columns(rows, np.int64, object, np.float64)
+
+        size = len(self.item_ids)
+        positions = self.positions(item_ids)
+        first_day = timezone.localtime(self.start).date()
+        day_numbers = {first_day + timedelta(days=number): number for number in range(self.days)}
+        day_index = np.fromiter(map(day_numbers.__getitem__, days), dtype=np.int64, count=len(days))
+        recent = day_index >= self.days - RECENT_DAYS
+        self.daily_consumption = np.bincount(positions, weights=used, minlength=size) / self.days
+        mean_square = np.bincount(positions, weights=used ** 2, minlength=size) / self.days
+        self.daily_deviation = np.sqrt(np.maximum(mean_square - self.daily_consumption ** 2, 0))
+        self.recent_consumption = np.bincount(
+            positions[recent], weights=used[recent], minlength=size
+        ) / min(RECENT_DAYS, self.days)
+
+    def load_suppliers(self):
+        """
+        Pick each item's cheapest supplier, the shortest lead time breaking ties.
+        """
+        rows = list(InventoryItemSupplier.objects.filter(item__in=self.items.order_by()).values_list(
+            'item_id', 'supplier_price', Coalesce('lead_time_days', Value(DEFAULT_LEAD_TIME_DAYS)),
+            'supplier_id', 'supplier__name'
+        ))
+        item_ids, prices, lead_times = columns(rows, np.int64, np.float64, np.float64)
+        order = np.lexsort((lead_times, prices, item_ids))
+        _, first = np.unique(item_ids[order], return_index=True)
+        cheapest = order[first]
+
+        positions = self.positions(item_ids[cheapest])
+        self.lead_time = np.full(len(self.item_ids), float(DEFAULT_LEAD_TIME_DAYS))
+        self.lead_time[positions] = lead_times[cheapest]
+        self.supplier_row = np.full(len(self.item_ids), -1)
+        self.supplier_row[positions] = cheapest
+        self.supplier_rows = rows
+
+    def compute(self):
+        rate = self.daily_consumption
+        with np.errstate(divide='ignore'):
+            self.days_of_cover = np.where(rate > 0, self.quantity / np.where(rate > 0, rate, 1), np.inf)
+        safety_stock = SERVICE_LEVEL_Z * self.daily_deviation * np.sqrt(self.lead_time)
+        self.reorder_point = np.ceil(np.maximum(rate * self.lead_time + safety_stock, self.threshold))
+        order_up_to = self.reorder_point + rate * REVIEW_DAYS
+        self.reorder_quantity = np.where(
+            self.quantity <= self.reorder_point, np.ceil(np.maximum(order_up_to - self.quantity, 0)), 0
+        ).astype(np.int64)
+
+    def suggestions(self):
+        """
+        Items that should be reordered now, those running out soonest first.
+        """
+        due = np.flatnonzero(self.reorder_quantity > 0)
+        due = due[np.lexsort((self.item_ids[due], self.days_of_cover[due]))]
+        details = self.items.in_bulk(self.item_ids[due].tolist())
+        suggestions = []
+        for position in due:
+            item = details[int(self.item_ids[position])]
+            quantity = int(self.reorder_quantity[position])
+            supplier = None
+            if self.supplier_row[position] >= 0:
+                _, price, _, supplier_id, supplier_name = self.supplier_rows[self.supplier_row[position]]
+                supplier = {
+                    'id': supplier_id,
+                    'name': supplier_name,
+                    'price': str(price),
+                    'estimated_cost': str((price * quantity).quantize(Decimal('0.01'))),
+                }
+            days_of_cover = self.days_of_cover[position]
+            suggestions.append({
+                'id': item.id,
+                'sku': item.sku,
+                'name': item.name,
+                'quantity': item.quantity,
+                'daily_consumption': round(float(self.daily_consumption[position]), 2),
+                'recent_daily_consumption': round(float(self.recent_consumption[position]), 2),
+                'days_of_cover': None if math.isinf(days_of_cover) else round(float(days_of_cover), 1),
+                'lead_time_days': int(self.lead_time[position]),
+                'reorder_point': int(self.reorder_point[position]),
+                'reorder_quantity': quantity,
+                'supplier': supplier,
+            })
+        return suggestions
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        # Counts queries on every connection from its first one on
+        from . import metrics  # noqa: F401
@@ -0,0 +1,48 @@
+import gzip
+import os
+from datetime import timezone as dt_timezone
+from itertools import groupby
+
+from django.db import transaction
+
+from .exports import LOG_EXPORT_FIELDS, iter_ndjson
+from .models import InventoryLog
+
+# The export columns plus the ids that tie a row back to its owner and user
+# once the item itself may be gone
+ARCHIVE_LOG_FIELDS = LOG_EXPORT_FIELDS + (
+    ('item_owner', 'item__owner_id'),
+    ('user', 'user_id'),
+)
+
+
+def archive_path(directory, timestamp):
+    return os.path.join(directory, f'inventory-logs-{timestamp.astimezone(dt_timezone.utc):%Y-%m}.ndjson.gz')
+
+
+def archive_batch(queryset, directory, batch_size):
+    """
+    Append the oldest `batch_size` logs of the queryset to monthly gzipped
+    NDJSON files in `directory`, then delete them. Returns how many were moved.
+
+    Files are synced to disk before the delete commits, so a crash can at worst
+    leave rows both archived and in the table; the next run appends them again
+    and readers should keep the last line per id.
+    """
+    headers = [header for header, _ in ARCHIVE_LOG_FIELDS]
+    timestamp_index = headers.index('timestamp')
+    with transaction.atomic():
+        ids = list(queryset.order_by('timestamp', 'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        rows = InventoryLog.objects.filter(id__in=ids).order_by('timestamp', 'id').values_list(
+            *[lookup for _, lookup in ARCHIVE_LOG_FIELDS]
+        )
+        for path, month_rows in groupby(rows, key=lambda row: archive_path(directory, row[timestamp_index])):
+            with gzip.open(path, 'at', encoding='utf-8') as archive:
+                for chunk in iter_ndjson(month_rows, headers):
+                    archive.write(chunk)
+                archive.flush()
+                os.fsync(archive.fileno())
+        InventoryLog.objects.filter(id__in=ids).delete()
+    return len(ids)
@@ -0,0 +1,227 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, NotAcceptable
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .authentication import jwt_authentication, user_from_claims
+from .cache import cache_stats, get_versions, owner_scope, response_cache_key
+from .compiled import compile_serializer
+from .conditional import (
+    detail_key, list_key, make_validators, set_validator_headers, state_aggregates, state_cache_key,
+    state_queryset
+)
+from .models import InventoryItem, InventoryLog, StockStatus
+from .pagination import KeysetPagination
+from .serializers import InventoryItemSerializer, InventoryLevelSerializer, InventoryLogSerializer
+from .views import InventoryItemViewSet
+
+# Async counterparts of the hot read endpoints, routed in front of the DRF
+# viewsets when INVENTORY_ASYNC_READS is on. They answer plain GETs with the
+# same payloads, validators and cache entries as the viewsets. Anything else
+# (writes, filters, search, ordering) is handed to the viewset.
+
+renderers = [renderer_class() for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES]
+renderer = renderers[0]
+negotiation = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS()
+
+
+def accepts_json(request):
+    """
+    Whether DRF's content negotiation would pick the JSON renderer, the only
+    one the async views render with.
+    """
+    try:
+        return negotiation.select_renderer(Request(request), renderers)[0] is renderer
+    except NotAcceptable:
+        return False
+
+
+async def authenticate(request):
+    """
+    JWT or session authentication without a thread hop for the user lookup.
+    Returns None for missing or rejected credentials, leaving the viewset to
+    answer with DRF's 401 body and WWW-Authenticate challenge.
+    """
+    jwt = jwt_authentication()
+    header = jwt.get_header(request)
+    try:
+        raw_token = None if header is None else jwt.get_raw_token(header)
+    except AuthenticationFailed:
+        return None
+    if raw_token is None:
+        # Not a bearer token, so the session decides as SessionAuthentication would
+        user = await request.auser()
+        return user if user.is_authenticated else None
+
+    try:
+        token = jwt.get_validated_token(raw_token)
+        if settings.INVENTORY_STATELESS_JWT and (user := user_from_claims(token)) is not None:
+            return user
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]})
+    except (InvalidToken, KeyError, User.DoesNotExist):
+        return None
+    return user if user.is_active else None
+
+
+def render(data, status=200):
+    return HttpResponse(renderer.render(data), content_type='application/json', status=status)
+
+
+def item_queryset(user, serializer_class):
+    queryset = InventoryItem.objects.all()
+    if not user.is_staff:
+        queryset = queryset.filter(owner=user)
+    return serializer_class.setup_eager_loading(queryset)
+
+
+async def validate(request, user, key, queryset, cache_scopes, scopes):
+    """
+    Async version of ConditionalRequestMixin.get_validators(). Returns the
+    validators and a 304 response when the client's copy is current.
+    """
+    versions = await sync_to_async(get_versions)(*cache_scopes, *scopes)
+    cache_key = state_cache_key(key, user, versions)
+    state = await cache.aget(cache_key)
+    if state is None:
+        state = await state_queryset(queryset).aaggregate(**state_aggregates('last_updated'))
+        await cache.aset(cache_key, state, InventoryItemViewSet.validator_timeout)
+    etag, last_modified = make_validators(key, user, state, versions[len(cache_scopes):])
+    if etag is None:
+        return etag, last_modified, None
+    return etag, last_modified, get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+async def cached(request, user, action, pk, cache_scopes, build):
+    """
+    Async version of CachedResponseMixin.cached_response(), sharing its keys.
+    """
+    versions = await sync_to_async(get_versions)(*cache_scopes)
+    key = response_cache_key('items', action, pk, user, sorted(request.GET.lists()), versions)
+    data = await cache.aget(key)
+    if data is not None:
+        cache_stats.incr('hits')
+        return data
+    cache_stats.incr('misses')
+    data = await build()
+    if data is not None:
+        await cache.aset(key, data, InventoryItemViewSet.cache_timeout)
+    return data
+
+
+async def serialize(serializer_class, queryset):
+    compiled = compile_serializer(serializer_class)
+    return await compiled.arender([row async for row in compiled.values(queryset)])
+
+
+async def conditional_item_response(request, user, key, action, pk, queryset, build,
+                                    missing='No InventoryItem matches the given query.'):
+    cache_scopes = [owner_scope(user), 'categories', 'suppliers']
+    scopes = cache_scopes if key[0] == 'list' else ['categories', 'suppliers']
+    etag, last_modified, response = await validate(request, user, key, queryset, cache_scopes, scopes)
+    if response is not None:
+        set_validator_headers(response, etag, last_modified)
+        return response
+    if action in InventoryItemViewSet.cache_actions:
+        data = await cached(request, user, action, pk, cache_scopes, build)
+    else:
+        data = await build()
+    if data is None:
+        return render({'detail': missing}, status=404)
+    response = render(data)
+    set_validator_headers(response, etag, last_modified)
+    return response
+
+
+async def item_list(request, user):
+    queryset = item_queryset(user, InventoryItemSerializer)
+
+    async def build():
+        compiled = compile_serializer(InventoryItemSerializer)
+        paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        django_paginator = paginator.django_paginator_class(compiled.values(queryset), paginator.get_page_size(request))
+        # Paginator.count is a cached_property; fill it in without a sync query
+        django_paginator.count = await queryset.acount()
+        try:
+            page = django_paginator.page(request.GET.get(paginator.page_query_param, 1))
+        except InvalidPage:
+            return None
+        page.object_list = [row async for row in page.object_list]
+        paginator.page, paginator.request = page, request
+        return paginator.get_paginated_response(await compiled.arender(page.object_list)).data
+
+    key = list_key('items', 'list', request.GET)
+    return await conditional_item_response(request, user, key, 'list', None, queryset, build, missing='Invalid page.')
+
+
+async def item_detail(request, user, pk):
+    queryset = item_queryset(user, InventoryItemSerializer).filter(pk=pk)
+
+    async def build():
+        item = await queryset.afirst()
+        return None if item is None else InventoryItemSerializer(item).data
+
+    key = detail_key('items', pk)
+    return await conditional_item_response(request, user, key, 'retrieve', str(pk), queryset, build)
+
+
+async def stock_level(request, user):
+    queryset = item_queryset(user, InventoryLevelSerializer)
+    key = list_key('items', 'stock_level', request.GET)
+    return await conditional_item_response(
+        request, user, key, 'stock_level', None, queryset, lambda: serialize(InventoryLevelSerializer, queryset)
+    )
+
+
+async def item_stock_level(request, user, pk):
+    queryset = item_queryset(user, InventoryLevelSerializer).filter(pk=pk)
+
+    async def build():
+        item = await queryset.afirst()
+        return None if item is None else InventoryLevelSerializer(item).data
+
+    key = detail_key('items', pk)
+    return await conditional_item_response(
+        request, user, key, 'item_stock_level', str(pk), queryset, build
+    )
+
+
+async def low_stock(request, user):
+    queryset = item_queryset(user, InventoryItemSerializer).filter(stock_status__lte=StockStatus.LOW)
+    return render(await serialize(InventoryItemSerializer, queryset))
+
+
+async def log_list(request, user):
+    queryset = InventoryLog.objects.select_related('item', 'user')
+    if not user.is_staff:
+        queryset = queryset.filter(item__owner=user)
+    paginator = KeysetPagination()
+    page = paginator.set_page([log async for log in paginator.get_page_queryset(queryset, request)])
+    return render(paginator.get_paginated_response(InventoryLogSerializer(page, many=True).data).data)
+
+
+def async_read_view(handler, sync_view, params=()):
+    """
+    Wrap an async read handler as a view that serves authenticated JSON GETs
+    using only the query parameters in `params` and passes every other request,
+    including unauthenticated ones, to `sync_view`.
+    """
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or not set(request.GET).issubset(params) or not accepts_json(request):
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        user = await authenticate(request)
+        if user is None:
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        return await handler(request, user, *args, **kwargs)
+    # Seen as the viewset action it stands in for, e.g. by the metrics
+    view.cls, view.actions = sync_view.cls, sync_view.actions
+    return view
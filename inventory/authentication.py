@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import blacklisted_jtis
+from .models import ClaimsUser
+
+# Claims stamped into the tokens next to the user id, enough to authorize most
+# requests without loading the user
+USER_CLAIMS = ('username', 'is_staff')
+
+
+def stamp_claims(token, user):
+    token['username'] = user.username
+    token['is_staff'] = user.is_staff
+
+
+class InventoryRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user claims (access tokens made from it copy
+    them) and remembering blacklisted JTIs in process.
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        stamp_claims(token, user)
+        return token
+
+    def check_blacklist(self):
+        jti = self.payload[jwt_settings.JTI_CLAIM]
+        if blacklisted_jtis.get(jti):
+            raise TokenError("Token is blacklisted")
+        try:
+            super().check_blacklist()
+        except TokenError:
+            blacklisted_jtis.set(jti, True)
+            raise
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklisted_jtis.set(self.payload[jwt_settings.JTI_CLAIM], True)
+        return result
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):
+    token_class = InventoryRefreshToken
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    """
+    simplejwt's refresh, re-stamping the user claims from the current row so
+    a changed username or staff flag reaches the next access token.
+    """
+    token_class = InventoryRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{jwt_settings.USER_ID_FIELD: refresh[jwt_settings.USER_ID_CLAIM]})
+        except (KeyError, User.DoesNotExist):
+            user = None
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        stamp_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
+
+
+def user_from_claims(token):
+    """
+    ClaimsUser for a validated access token, or None when the token predates
+    the user claims or revocation checks need the password hash.
+    """
+    if jwt_settings.CHECK_REVOKE_TOKEN:
+        return None
+    try:
+        return ClaimsUser.from_claims(
+            token[jwt_settings.USER_ID_CLAIM], *(token[claim] for claim in USER_CLAIMS)
+        )
+    except KeyError:
+        return None
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User query: the user is built
+    from the token claims. Deactivating a user takes effect when their access
+    tokens expire, and a staff flag change when they are next refreshed.
+    """
+    def get_user(self, validated_token):
+        return user_from_claims(validated_token) or super().get_user(validated_token)
+
+
+def jwt_authentication():
+    """
+    The JWT authenticator for views outside DRF, per INVENTORY_STATELESS_JWT.
+    """
+    return (ClaimsJWTAuthentication if settings.INVENTORY_STATELESS_JWT else JWTAuthentication)()
@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+KEY_PREFIX = 'inventory'
+
+
+def version_key(scope):
+    return f'{KEY_PREFIX}:version:{scope}'
+
+
+def get_versions(*scopes):
+    """
+    Return the current version of each scope. Cached values embed these
+    versions in their keys, so bumping a version invalidates every entry built
+    from that scope without having to find and delete them. A version is the
+    time of the scope's last write in nanoseconds, so it also serves as a
+    Last-Modified time.
+    """
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seeding from the clock means an evicted version never comes back
+            # with a value that older entries were cached under.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_versions(*scopes):
+    cache.set_many({version_key(scope): time.time_ns() for scope in scopes}, None)
+
+
+def invalidate(*scopes):
+    """
+    Bump the scopes now and again when the current transaction commits, so a
+    reader that cached pre-commit data in between is also invalidated.
+    """
+    bump_versions(*scopes)
+    transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+def owner_scope(user):
+    """
+    The item scope a user's reads depend on: their own, or the catalog-wide
+    one for staff.
+    """
+    return 'items' if user.is_staff else f'items:{user.id}'
+
+
+def response_cache_key(basename, action, pk, user, query, versions):
+    # Only token claims, so a stateless request user isn't loaded for the key.
+    # A deleted user's item scopes are bumped, so an id reused later can't
+    # reach their entries.
+    raw = repr((basename, action, pk, user.pk, user.is_staff, query, versions))
+    return f'{KEY_PREFIX}:response:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def item_scopes(owner_ids):
+    """
+    Version scopes touched by a write to items of the given owners: each
+    owner's own scope plus the catalog-wide one used by staff views.
+    """
+    return ['items'] + [f'items:{owner_id}' for owner_id in owner_ids]
+
+
+class CacheStats:
+    """
+    Process-local hit/miss counters for the response cache.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {'hits': 0, 'misses': 0, 'lock_waits': 0}
+
+    def incr(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+cache_stats = CacheStats()
+
+
+class TTLCache:
+    """
+    Process-local LRU mapping of at most `maxsize` entries, each dropped
+    `ttl` seconds after it was set.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Full User rows behind the claims-built request users, and refresh token
+# JTIs known to be blacklisted (a blacklisting is never undone)
+user_rows = TTLCache(settings.INVENTORY_AUTH_CACHE_SIZE, settings.INVENTORY_AUTH_CACHE_TTL)
+blacklisted_jtis = TTLCache(settings.INVENTORY_AUTH_CACHE_SIZE, settings.INVENTORY_AUTH_CACHE_TTL)
+
+
+class CachedResponseMixin:
+    """
+    Caches the serialized data of list and retrieve responses per user and
+    query string. Keys embed the versions of `get_cache_scopes()`, which model
+    signals bump on writes. On a cold key only one request rebuilds the entry;
+    concurrent ones wait briefly for it instead of all hitting the database.
+    """
+    cache_actions = ('list', 'retrieve')
+    cache_timeout = 60 * 5
+    cache_lock_timeout = 10
+    cache_wait_attempts = 20
+    cache_wait_interval = 0.05
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def get_cache_key(self, request):
+        return response_cache_key(
+            self.basename, self.action, self.kwargs.get('pk'), request.user,
+            sorted(request.query_params.lists()), get_versions(*self.get_cache_scopes())
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.cache_actions or not request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            cache_stats.incr('hits')
+            return Response(data)
+
+        lock_key = key + ':lock'
+        locked = cache.add(lock_key, 1, self.cache_lock_timeout)
+        if not locked:
+            cache_stats.incr('lock_waits')
+            for _ in range(self.cache_wait_attempts):
+                time.sleep(self.cache_wait_interval)
+                data = cache.get(key)
+                if data is not None:
+                    cache_stats.incr('hits')
+                    return Response(data)
+
+        cache_stats.incr('misses')
+        try:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, self.cache_timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,241 @@
+from decimal import Decimal
+from functools import lru_cache, partial
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils import timezone
+from django.utils.encoding import force_str
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .metrics import timed_serialization
+
+# Fields whose representation differs from the value the database driver
+# returns. Everything else (ints, strings, booleans, primary keys) is passed
+# through unchanged, exactly as DRF would render it.
+CONVERTED_FIELDS = (
+    serializers.DateTimeField, serializers.DateField, serializers.TimeField, serializers.DurationField,
+    serializers.DecimalField, serializers.FloatField, serializers.UUIDField,
+)
+
+
+def datetime_converter(field):
+    """
+    DateTimeField.to_representation() with the timezone looked up once per
+    page instead of once per value.
+    """
+    timezone_ = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if timezone_ is None:
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(timezone_).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def decimal_converter(field):
+    """
+    DecimalField.to_representation() that skips quantizing values the
+    database already returns at the field's scale.
+    """
+    exponent = -field.decimal_places
+
+    def convert(value):
+        if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return '{:f}'.format(value)
+        return field.to_representation(value)
+    return convert
+
+
+def display_converter(model_field):
+    """
+    Model.get_FOO_display() applied to a raw value.
+    """
+    choices = dict(model_field.flatchoices)
+    return lambda value: force_str(choices.get(value, value), strings_only=True)
+
+
+def get_converter_factory(field):
+    if not isinstance(field, CONVERTED_FIELDS):
+        return None
+    if isinstance(field, serializers.DateTimeField):
+        if getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+            return lambda: datetime_converter(field)
+    elif isinstance(field, serializers.DecimalField):
+        coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if coerce_to_string and not field.localize and field.decimal_places is not None:
+            return lambda: decimal_converter(field)
+    return lambda: field.to_representation
+
+
+class CompiledSerializer:
+    """
+    Read-only counterpart of a ModelSerializer that renders values() rows
+    instead of model instances. The serializer's fields are worked out once:
+    plain and dotted sources become values() lookups, nested many=True
+    serializers one extra query per page, and SerializerMethodFields are read
+    from the SQL expressions the serializer lists in `sql_fields`. The output
+    matches what the serializer itself produces.
+    """
+    def __init__(self, serializer_class, fields=None):
+        self.model = serializer_class.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.fields = []
+        self.nested = []
+        self.annotations = {}
+        lookups = [self.pk]
+        sql_fields = getattr(serializer_class, 'sql_fields', {})
+
+        serializer = serializer_class() if fields is None else serializer_class(fields=fields)
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.get_model_field(serializer_class, field.source)
+                self.nested.append((name, relation.field.attname, compile_serializer(type(field.child))))
+                self.fields.append((name, None, None, None))
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in sql_fields:
+                    raise ImproperlyConfigured(
+                        f"{serializer_class.__name__}.sql_fields has no expression for '{name}'"
+                    )
+                key = f'{name}_sql'
+                self.annotations[key] = sql_fields[name]
+                self.fields.append((name, key, None, None))
+                lookups.append(key)
+                continue
+
+            display = self.get_display_field(field.source)
+            if display is not None:
+                self.fields.append((name, display.attname, partial(display_converter, display), None))
+                lookups.append(display.attname)
+                continue
+
+            source_attrs = field.source_attrs
+            model_field = self.get_model_field(serializer_class, source_attrs[0])
+            # DRF leaves a dotted field out when the relation it goes through is
+            # empty, so keep the foreign key to tell that apart from a null value.
+            guard = model_field.attname if len(source_attrs) > 1 else None
+            key = '__'.join(source_attrs)
+            self.fields.append((name, key, get_converter_factory(field), guard))
+            lookups += [key, guard] if guard else [key]
+
+        self.lookups = list(dict.fromkeys(lookups))
+        self.index = {lookup: position for position, lookup in enumerate(self.lookups)}
+
+    def get_model_field(self, serializer_class, name):
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f"{serializer_class.__name__} can't be compiled: '{name}' is not a field of {self.model.__name__}"
+            )
+
+    def get_display_field(self, source):
+        """
+        The choices field behind a `get_FOO_display` source, if it is one.
+        """
+        if not (source.startswith('get_') and source.endswith('_display')):
+            return None
+        try:
+            model_field = self.model._meta.get_field(source[4:-8])
+        except FieldDoesNotExist:
+            return None
+        return model_field if model_field.choices else None
+
+    def values(self, queryset, extra=()):
+        """
+        Rows for render(): tuples of the lookups, followed by any `extra` ones.
+        """
+        return queryset.prefetch_related(None).annotate(**self.annotations).values_list(*self.lookups, *extra)
+
+    def render(self, rows):
+        rows = list(rows)
+        nested = {}
+        for name, attname, child in self.nested:
+            child_rows = list(self.nested_rows(attname, child, rows))
+            nested[name] = self.group(child, child_rows, child.render(child_rows))
+        return self.assemble(rows, nested)
+
+    async def arender(self, rows):
+        nested = {}
+        for name, attname, child in self.nested:
+            child_rows = [row async for row in self.nested_rows(attname, child, rows)]
+            nested[name] = self.group(child, child_rows, await child.arender(child_rows))
+        return self.assemble(rows, nested)
+
+    def nested_rows(self, attname, child, rows):
+        pk = self.index[self.pk]
+        ids = [row[pk] for row in rows]
+        queryset = child.model._default_manager.filter(**{f'{attname}__in': ids}).order_by('pk')
+        return child.values(queryset if ids else queryset.none(), extra=[attname])
+
+    def group(self, child, rows, data):
+        # The parent key is the extra lookup after the child's own ones
+        position = len(child.lookups)
+        grouped = {}
+        for row, item in zip(rows, data):
+            grouped.setdefault(row[position], []).append(item)
+        return grouped
+
+    def assemble(self, rows, nested):
+        with timed_serialization():
+            return self.build(rows, nested)
+
+    def build(self, rows, nested):
+        pk = self.index[self.pk]
+        fields = [
+            (
+                name,
+                None if key is None else self.index[key],
+                factory() if factory else None,
+                None if guard is None else self.index[guard],
+            )
+            for name, key, factory, guard in self.fields
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, position, convert, guard in fields:
+                if position is None:
+                    item[name] = nested[name].get(row[pk], [])
+                elif guard is None or row[guard] is not None:
+                    value = row[position]
+                    item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+    def data(self, queryset):
+        return self.render(self.values(queryset))
+
+
+@lru_cache(maxsize=256)
+def compile_serializer(serializer_class, fields=None):
+    return CompiledSerializer(serializer_class, fields)
+
+
+class CompiledListMixin:
+    """
+    Serves the list action from the compiled form of the action's serializer,
+    skipping model instances and per-field serializer machinery.
+    """
+    def get_serializer_fields(self):
+        """
+        Fields to restrict the serializer to, or None for all of them.
+        """
+        return None
+
+    def get_compiled_serializer(self):
+        return compile_serializer(self.get_serializer_class(), self.get_serializer_fields())
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        rows = compiled.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.render(page))
+        return Response(compiled.render(rows))
@@ -0,0 +1,160 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .cache import KEY_PREFIX, get_versions
+
+
+def list_key(basename, action, query_params):
+    return ('list', basename, action, tuple(sorted(query_params.lists())))
+
+
+def detail_key(basename, pk):
+    return ('detail', basename, str(pk))
+
+
+def state_cache_key(key, user, versions):
+    # Claims only, like response_cache_key
+    raw = repr(key + (user.pk, user.is_staff, versions))
+    return f'{KEY_PREFIX}:validators:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def state_queryset(queryset):
+    return queryset.prefetch_related(None).order_by()
+
+
+def state_aggregates(last_modified_field):
+    return {'last_modified': Max(last_modified_field), 'count': Count('pk')}
+
+
+def make_validators(key, user, state, versions):
+    """
+    ETag and Last-Modified (epoch seconds) for a queryset's aggregate state and
+    the versions of the scopes it depends on. A detail key whose row doesn't
+    exist gets none, so the view can answer 404 as usual.
+    """
+    if key[0] == 'detail' and not state['count']:
+        return None, None
+
+    timestamps = [version / 1e9 for version in versions]
+    if state['last_modified']:
+        timestamps.append(state['last_modified'].timestamp())
+    last_modified = int(max(timestamps)) if timestamps else None
+
+    raw = repr(key + (user.pk, user.is_staff, state['last_modified'], state['count'], versions))
+    etag = '"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+    return etag, last_modified
+
+
+def set_validator_headers(response, etag, last_modified):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+class PreconditionResponse(Exception):
+    """
+    Raised from initial() to answer a request with a 304 or 412 before the
+    handler runs.
+    """
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalRequestMixin:
+    """
+    ETag/Last-Modified support for viewsets whose model has a modification
+    timestamp.
+
+    Collection validators come from one MAX(timestamp)/COUNT query over the
+    filtered queryset, memoized until the next write. The versions of the
+    view's cache scopes are folded in so that changes to related rows
+    (category names, suppliers) and deletions are noticed too. Detail validators use the object's own timestamp plus
+    `conditional_detail_scopes`. GET requests with a matching If-None-Match or
+    If-Modified-Since get a 304 before any serialization. PUT/PATCH honour
+    If-Match for optimistic concurrency.
+    """
+    last_modified_field = 'last_updated'
+    conditional_list_actions = ('list',)
+    conditional_detail_actions = ('retrieve', 'update', 'partial_update')
+    conditional_detail_scopes = ()
+    validator_timeout = 60 * 5
+
+    def get_cache_scopes(self):
+        return []
+
+    def get_conditional_state(self, get_queryset, key, scopes):
+        """
+        MAX(timestamp) and COUNT(*) of the queryset, memoized under the versions
+        of the view's cache scopes. Every write bumps one of those, so until one
+        happens the database doesn't need asking again.
+        """
+        cache_key = state_cache_key(key, self.request.user, get_versions(*self.get_cache_scopes(), *scopes))
+        state = cache.get(cache_key)
+        if state is None:
+            state = state_queryset(get_queryset()).aggregate(**state_aggregates(self.last_modified_field))
+            cache.set(cache_key, state, self.validator_timeout)
+        return state
+
+    def get_validators(self, request):
+        if self.action in self.conditional_list_actions:
+            def get_queryset():
+                queryset = self.get_queryset()
+                if self.action == 'list':
+                    queryset = self.filter_queryset(queryset)
+                return queryset
+            scopes = tuple(self.get_cache_scopes())
+            key = list_key(self.basename, self.action, request.query_params)
+        else:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            try:
+                # Build the filter up front so a malformed lookup is left to
+                # get_object() to turn into a 404
+                queryset = self.get_queryset().filter(**lookup)
+            except (TypeError, ValueError, ValidationError):
+                return None, None
+            get_queryset = lambda: queryset
+            scopes = tuple(self.conditional_detail_scopes)
+            key = detail_key(self.basename, self.kwargs[lookup_url_kwarg])
+
+        state = self.get_conditional_state(get_queryset, key, scopes)
+        return make_validators(key, request.user, state, get_versions(*scopes))
+
+    def is_conditional_action(self, request):
+        if request.method in ('GET', 'HEAD'):
+            return self.action in self.conditional_list_actions + self.conditional_detail_actions
+        return request.method in ('PUT', 'PATCH') and self.action in self.conditional_detail_actions
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if not self.is_conditional_action(request):
+            return
+        self.etag, self.last_modified = self.get_validators(request)
+        if self.etag is None:
+            return
+        response = get_conditional_response(request._request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None:
+            set_validator_headers(response, self.etag, self.last_modified)
+            raise PreconditionResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, PreconditionResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200 and getattr(self, 'etag', None):
+            if request.method in ('PUT', 'PATCH'):
+                # The write changed the object, so hand back its new validators
+                self.etag, self.last_modified = self.get_validators(request)
+            set_validator_headers(response, self.etag, self.last_modified)
+        return response
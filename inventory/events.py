@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+ALL_CHANNEL = 'all'
+
+# Queued in place of the backlog when a subscriber falls too far behind
+OVERFLOW = {'type': 'overflow'}
+
+
+def owner_channel(owner_id):
+    return f'owner:{owner_id}'
+
+
+class Subscription:
+    """
+    A bounded queue of events for one streaming client, owned by the event
+    loop that created it. A client that lets the queue fill up has its backlog
+    replaced by a single OVERFLOW event, after which it should reconnect and
+    refetch, so a slow reader never holds memory or stalls publishers.
+    """
+    def __init__(self, channels, maxsize):
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class InMemoryBroker:
+    """
+    In-process pub/sub. Publishing is thread-safe and never blocks: events are
+    handed to each subscriber's event loop. Only reaches streams served by the
+    same process, which is enough for a single worker and for tests.
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self._subscriptions.pop(channel, None)
+
+    def publish(self, channels, event):
+        self.dispatch(channels, event)
+
+    def dispatch(self, channels, event):
+        with self._lock:
+            subscriptions = set().union(*(self._subscriptions.get(channel, ()) for channel in channels))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down without unsubscribing
+                self.unsubscribe(subscription)
+
+
+class PostgresBroker(InMemoryBroker):
+    """
+    Fans events out across processes with PostgreSQL LISTEN/NOTIFY. Each
+    process runs one listener thread on a dedicated connection and dispatches
+    what it hears to its local subscribers.
+    """
+    notify_channel = 'inventory_events'
+    poll_interval = 5
+    reconnect_delay = 1
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, channels):
+        self.start_listener()
+        return super().subscribe(channels)
+
+    def publish(self, channels, event):
+        payload = json.dumps({'channels': channels, 'event': event}, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.notify_channel, payload])
+
+    def start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self.listen, name='inventory-events', daemon=True)
+                self._listener.start()
+
+    def listen(self):
+        while True:
+            try:
+                conn = connection.get_new_connection(connection.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.notify_channel}')
+                while True:
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = json.loads(conn.notifies.pop(0).payload)
+                        self.dispatch(message['channels'], message['event'])
+            except Exception:
+                logger.exception("Inventory event listener failed, reconnecting")
+                time.sleep(self.reconnect_delay)
+
+
+_broker = None
+
+
+def get_broker():
+    """
+    Return the broker configured by INVENTORY_EVENT_BROKER, a dotted path.
+    """
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'INVENTORY_EVENT_BROKER', 'inventory.events.InMemoryBroker'))()
+    return _broker
+
+
+def publish(owner_id, event):
+    """
+    Publish an event to its owner's stream and the staff-wide one once the
+    current transaction commits.
+    """
+    channels = [ALL_CHANNEL]
+    if owner_id is not None:
+        channels.append(owner_channel(owner_id))
+    transaction.on_commit(lambda: get_broker().publish(channels, event), robust=True)
+
+
+def log_event(log):
+    return {
+        'type': 'inventory_log',
+        'id': log.id,
+        'item': log.item_id,
+        'action': log.action,
+        'quantity_change': log.quantity_change,
+        'previous_quantity': log.previous_quantity,
+        'new_quantity': log.new_quantity,
+        'timestamp': log.timestamp,
+    }
+
+
+def stock_event(event_type, item):
+    return {
+        'type': event_type,
+        'item': item.id,
+        'sku': item.sku,
+        'quantity': item.quantity,
+        'threshold': item.low_stock_threshold,
+    }
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def event_stream(broker, channels, heartbeat=15, retry=3000):
+    """
+    Subscribe to `channels` and yield their events as Server-Sent Events,
+    with a comment line whenever it has been quiet for `heartbeat` seconds so
+    proxies keep the connection open. Ends after an overflow; the client
+    reconnects after `retry` milliseconds. Subscribing on the first iteration
+    means a response closed before streaming leaves nothing behind.
+    """
+    subscription = broker.subscribe(channels)
+    try:
+        yield f"retry: {retry}\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event)
+            if event is OVERFLOW:
+                break
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,97 @@
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+ITEM_EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('sku', 'sku'),
+    ('name', 'name'),
+    ('description', 'description'),
+    ('category_name', 'category__name'),
+    ('quantity', 'quantity'),
+    ('price', 'price'),
+    ('location', 'location'),
+    ('low_stock_threshold', 'low_stock_threshold'),
+    ('owner_username', 'owner__username'),
+    ('date_added', 'date_added'),
+    ('last_updated', 'last_updated'),
+)
+
+LOG_EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('item', 'item_id'),
+    ('item_name', 'item__name'),
+    ('item_sku', 'item__sku'),
+    ('username', 'user__username'),
+    ('action', 'action'),
+    ('quantity_change', 'quantity_change'),
+    ('previous_quantity', 'previous_quantity'),
+    ('new_quantity', 'new_quantity'),
+    ('timestamp', 'timestamp'),
+    ('notes', 'notes'),
+)
+
+CHUNK_SIZE = 2000
+
+encoder = DjangoJSONEncoder()
+
+
+class Echo:
+    """
+    File-like object whose write() hands the line back, so csv.writer can be
+    used to format rows for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+def format_csv_value(value):
+    if isinstance(value, (datetime, date, Decimal)):
+        return encoder.default(value)
+    return value
+
+
+def iter_csv(rows, headers):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow([format_csv_value(value) for value in row]))
+        if len(buffer) >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_ndjson(rows, headers):
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n')
+        if len(buffer) >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_response(queryset, fields, export_format, filename):
+    """
+    Stream a queryset as CSV or NDJSON straight from a database cursor, without
+    building model instances or holding the result set in memory.
+    """
+    headers = [header for header, _ in fields]
+    rows = queryset.prefetch_related(None).values_list(*[lookup for _, lookup in fields]).iterator(chunk_size=CHUNK_SIZE)
+    content = iter_csv(rows, headers) if export_format == 'csv' else iter_ndjson(rows, headers)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
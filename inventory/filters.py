@@ -1,14 +1,20 @@
 from django_filters import rest_framework as filters
-from .models import InventoryItem
+from .models import InventoryItem, StockStatus
 
 class InventoryItemFilter(filters.FilterSet):
     min_price = filters.NumberFilter(field_name="price", lookup_expr='gte')
     max_price = filters.NumberFilter(field_name="price", lookup_expr='lte')
     low_stock = filters.NumberFilter(field_name="quantity", lookup_expr='lte')
     category = filters.CharFilter(field_name="category__name", lookup_expr='icontains')
+    stock_status = filters.ChoiceFilter(
+        choices=[(status.name.lower(), status.label) for status in StockStatus], method='filter_stock_status'
+    )
     
     class Meta:
         model = InventoryItem
-        fields = ['category', 'location', 'min_price', 'max_price', 'low_stock']
+        fields = ['category', 'location', 'min_price', 'max_price', 'low_stock', 'stock_status']
+        
+    def filter_stock_status(self, queryset, name, value):
+        return queryset.filter(stock_status=StockStatus[value.upper()])
                       
         
\ No newline at end of file
@@ -0,0 +1,207 @@
+import csv
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate
+from .models import (
+    Category, InventoryItem, InventoryLog, invalidate_item_caches, publish_log_events, sync_low_stock_alerts
+)
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+UPSERT_FIELDS = ['name', 'description', 'quantity', 'price', 'category', 'location', 'low_stock_threshold', 'last_updated']
+
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename):
+    if filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_rows(stream, file_format):
+    """
+    Yield (line number, row dict) pairs from a CSV or JSON Lines text stream
+    without loading the whole file.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_num, None
+
+
+def clean_field(model, name, value):
+    """
+    Value converted and validated as the model field would on save (types,
+    max_length, digits, minimums, finite decimals), or ValueError.
+    """
+    try:
+        return model._meta.get_field(name).clean(value, None)
+    except ValidationError as e:
+        raise ValueError(f"{name}: {' '.join(e.messages)}")
+
+
+def clean_row(row):
+    if not isinstance(row, dict):
+        raise ValueError("row is not a valid JSON object")
+    sku = str(row.get('sku') or '').strip()
+    name = str(row.get('name') or '').strip()
+    if not sku:
+        raise ValueError("sku is required")
+    if not name:
+        raise ValueError("name is required")
+    threshold = row.get('low_stock_threshold')
+    price = row.get('price')
+    values = {
+        'sku': sku,
+        'name': name,
+        'description': row.get('description') or None,
+        'quantity': row.get('quantity'),
+        # Through str so a JSON 9.99 stays 9.99 rather than its binary expansion
+        'price': str(price) if isinstance(price, float) else price,
+        'location': row.get('location') or None,
+        'low_stock_threshold': threshold if threshold not in (None, '') else 10,
+    }
+    cleaned = {field: clean_field(InventoryItem, field, value) for field, value in values.items()}
+    category = str(row.get('category') or '').strip()
+    cleaned['category'] = clean_field(Category, 'name', category) if category else None
+    return cleaned
+
+
+def resolve_categories(names, cache):
+    missing = {name for name in names if name not in cache}
+    if missing:
+        cache.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+        missing -= cache.keys()
+        if missing:
+            Category.objects.bulk_create([Category(name=name) for name in missing], ignore_conflicts=True)
+            # bulk_create sends no post_save, so the category caches are bumped here
+            invalidate('categories')
+            cache.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+
+
+def import_batch(batch, user, category_cache, result):
+    # The last row wins when a SKU repeats within a batch.
+    rows = {row['sku']: (line_num, row) for line_num, row in batch}
+    resolve_categories({row['category'] for _, row in rows.values() if row['category']}, category_cache)
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Locked, so an owner can't change between the check and the update
+        existing = {
+            sku: (item_id, quantity, owner_id)
+            for sku, item_id, quantity, owner_id in InventoryItem.objects.select_for_update()
+            .filter(sku__in=rows.keys()).values_list('sku', 'id', 'quantity', 'owner_id')
+        }
+        updates = []
+        inserts = []
+        lines = {}
+        for sku, (line_num, row) in rows.items():
+            if sku in existing and existing[sku][2] != user.id and not user.is_staff:
+                result['errors'].append({'line': line_num, 'error': f"SKU '{sku}' belongs to another user"})
+                continue
+            lines[sku] = line_num
+            category_name = row.pop('category')
+            item = InventoryItem(category_id=category_cache.get(category_name), last_updated=now, **row)
+            if sku in existing:
+                item.pk, _, item.owner_id = existing[sku]
+                updates.append(item)
+            else:
+                item.owner_id = user.id
+                inserts.append(item)
+
+        # New SKUs are only inserted, never upserted: a row another import
+        # created since the lookup above is left alone and reported
+        InventoryItem.objects.bulk_create(inserts, ignore_conflicts=True)
+        inserted = {
+            sku: (item_id, owner_id)
+            for sku, item_id, owner_id in InventoryItem.objects.filter(sku__in=[item.sku for item in inserts])
+            .values_list('sku', 'id', 'owner_id')
+        }
+        for item in inserts:
+            item.pk, owner_id = inserted[item.sku]
+            if owner_id != user.id:
+                result['errors'].append({
+                    'line': lines[item.sku], 'error': f"SKU '{item.sku}' belongs to another user"
+                })
+        inserts = [item for item in inserts if inserted[item.sku][1] == user.id]
+        InventoryItem.objects.bulk_update(updates, UPSERT_FIELDS)
+        items = updates + inserts
+        if not items:
+            return
+
+        logs = []
+        for item in items:
+            if item.sku in existing:
+                previous_quantity = existing[item.sku][1]
+                result['updated'] += 1
+                logs.append(InventoryLog(
+                    item=item,
+                    user=user,
+                    action='UPDATE',
+                    quantity_change=abs(item.quantity - previous_quantity),
+                    previous_quantity=previous_quantity,
+                    new_quantity=item.quantity,
+                    timestamp=now,
+                    notes=f"Item '{item.name}' updated by import from {user.username}"
+                ))
+            else:
+                result['created'] += 1
+                logs.append(InventoryLog(
+                    item=item,
+                    user=user,
+                    action='ADD',
+                    quantity_change=item.quantity,
+                    previous_quantity=item.quantity,
+                    new_quantity=item.quantity,
+                    timestamp=now,
+                    notes=f"New item '{item.name}' imported with quantity {item.quantity} by {user.username}"
+                ))
+        InventoryLog.objects.bulk_create(logs)
+        publish_log_events(logs)
+        sync_low_stock_alerts(items)
+        invalidate_item_caches(item.owner_id for item in items)
+
+
+def import_items(stream, file_format, user, batch_size=1000):
+    """
+    Upsert InventoryItems keyed by SKU from a CSV or JSON Lines stream, in batches.
+    Returns a summary with created/updated counts, row errors and throughput.
+    """
+    result = {'rows': 0, 'created': 0, 'updated': 0, 'errors': []}
+    category_cache = {}
+    batch = []
+    started = time.perf_counter()
+
+    for line_num, row in read_rows(stream, file_format):
+        result['rows'] += 1
+        try:
+            batch.append((line_num, clean_row(row)))
+        except ValueError as e:
+            result['errors'].append({'line': line_num, 'error': str(e)})
+        if len(batch) >= batch_size:
+            import_batch(batch, user, category_cache, result)
+            batch = []
+    if batch:
+        import_batch(batch, user, category_cache, result)
+
+    elapsed = time.perf_counter() - started
+    result['error_count'] = len(result['errors'])
+    result['errors'] = result['errors'][:MAX_REPORTED_ERRORS]
+    result['seconds'] = round(elapsed, 3)
+    result['rows_per_second'] = round(result['rows'] / elapsed, 1) if elapsed else None
+    return result
@@ -0,0 +1,49 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from inventory.archive import archive_batch
+from inventory.models import InventoryLog, InventorySnapshot
+from inventory.snapshots import day_start
+
+
+class Command(BaseCommand):
+    help = "Move inventory logs older than --days into gzipped NDJSON files, one per month"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help="Archive logs older than this many days")
+        parser.add_argument('--output-dir', required=True, help="Directory for the monthly archive files")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Logs moved per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many logs would be moved")
+        
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # History and as-of answers for archived days come from the snapshots,
+        # so only days before the last built one (which may have been built
+        # while still open) can go
+        last_built = InventorySnapshot.objects.aggregate(last=Max('date'))['last']
+        if last_built is None:
+            self.stderr.write("No stock snapshots have been built yet; run build_snapshots before archiving")
+            return
+        if day_start(last_built) < cutoff:
+            cutoff = day_start(last_built)
+            self.stderr.write(
+                f"Snapshots are only built up to {last_built:%Y-%m-%d}; archiving logs before that day. "
+                "Run build_snapshots to archive the rest"
+            )
+        queryset = InventoryLog.objects.filter(timestamp__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f"{queryset.count()} log(s) older than {cutoff:%Y-%m-%d} would be archived")
+            return
+        
+        os.makedirs(options['output_dir'], exist_ok=True)
+        archived = 0
+        while True:
+            moved = archive_batch(queryset, options['output_dir'], options['batch_size'])
+            if not moved:
+                break
+            archived += moved
+        self.stdout.write(f"Archived {archived} log(s) older than {cutoff:%Y-%m-%d} to {options['output_dir']}")
@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from inventory.analytics import StockAnalysis
+from inventory.models import InventoryItem, InventoryItemSupplier, InventoryLog, Supplier
+from inventory.snapshots import day_start
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Time the reorder analysis over a throwaway log history"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help="Items to create for the run")
+        parser.add_argument('--logs', type=int, default=1000000, help="REMOVE log rows to spread over the window")
+        parser.add_argument('--days', type=int, default=30, help="Consumption window in days")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs of the analysis; the best one is reported")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.create_rows(options['items'], options['logs'], options['days'])
+            self.stdout.write(f"Created {options['logs']} log rows in {time.perf_counter() - started:.1f} s")
+
+            items = InventoryItem.objects.filter(owner__username='benchmark-analytics')
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                analysis = StockAnalysis(items, options['days'])
+                timings.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            suggestions = analysis.suggestions()
+            rendered = time.perf_counter() - started
+            transaction.set_rollback(True)
+
+        best = min(timings)
+        self.stdout.write(
+            f"Analysis of {options['items']} items: {best:.2f} s ({options['logs'] / best:,.0f} log rows/s), "
+            f"{len(suggestions)} suggestions built in {rendered:.2f} s"
+        )
+
+    def create_rows(self, items, logs, days):
+        owner = User.objects.create(username='benchmark-analytics')
+        suppliers = [Supplier.objects.create(name=f'benchmark-analytics-{i}', owner=owner) for i in range(3)]
+        created = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f'Item {i}', sku=f'BENCH-ANL-{i}', quantity=i % 200, price='9.99', owner=owner)
+            for i in range(items)
+        ], batch_size=BATCH_SIZE)
+        InventoryItemSupplier.objects.bulk_create([
+            InventoryItemSupplier(
+                item=item, supplier=supplier, supplier_price=f'{4 + n}.50', lead_time_days=(i + n) % 14 or None
+            )
+            for i, item in enumerate(created)
+            for n, supplier in enumerate(suppliers[:i % 4])
+        ], batch_size=BATCH_SIZE)
+
+        start = day_start(timezone.localdate() - timedelta(days=days))
+        step = timedelta(days=days) / logs
+        rows = (
+            InventoryLog(
+                item=created[i % items], action='REMOVE', quantity_change=1 + i % 5,
+                previous_quantity=0, new_quantity=0, timestamp=start + step * i
+            )
+            for i in range(logs)
+        )
+        while batch := list(islice(rows, BATCH_SIZE)):
+            InventoryLog.objects.bulk_create(batch)
+        # Autovacuum can't see uncommitted rows, and without statistics the
+        # planner takes the tables for empty and picks nested loops
+        with connection.cursor() as cursor:
+            for model in [InventoryItem, InventoryItemSupplier, InventoryLog]:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
@@ -0,0 +1,290 @@
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from inventory.authentication import InventoryRefreshToken
+from inventory.models import (
+    Category, InventoryItem, InventoryItemSupplier, InventoryItemTombstone, InventoryLog, Supplier
+)
+
+PREFIX = 'benchmark-api'
+
+BATCH_SIZE = 10000
+
+ADJECTIVES = [
+    'steel', 'copper', 'plastic', 'wooden', 'rubber', 'glass', 'ceramic', 'carbon', 'brass', 'nylon',
+    'large', 'small', 'heavy', 'compact', 'industrial', 'portable', 'spare', 'sealed', 'coated', 'threaded',
+]
+
+NOUNS = [
+    'bolt', 'washer', 'bracket', 'hinge', 'valve', 'gasket', 'bearing', 'spring', 'cable', 'switch',
+    'fuse', 'relay', 'filter', 'pump', 'hose', 'clamp', 'pulley', 'sensor', 'socket', 'panel',
+]
+
+SCENARIOS = ('list', 'search', 'low_stock', 'adjust_quantity', 'log_feed')
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset (kept between runs) and time the item list, search, low stock, "
+        "adjust_quantity and log feed endpoints in-process, sequentially and from threads. Prints JSON. "
+        "Run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--items', type=int, default=100000)
+        parser.add_argument('--suppliers', type=int, default=500)
+        parser.add_argument('--logs', type=int, default=2000000)
+        parser.add_argument('--requests', type=int, default=200, help="Requests per scenario and mode")
+        parser.add_argument('--threads', type=int, default=8, help="Threads for the concurrent runs")
+        parser.add_argument('--warmup', type=int, default=10, help="Untimed requests before each scenario")
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the dataset and the requests")
+        parser.add_argument('--reseed', action='store_true', help="Drop and rebuild the dataset first")
+        parser.add_argument('--flush', action='store_true', help="Only drop the dataset")
+        parser.add_argument('--output', help="Write the report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        if options['flush'] or options['reseed']:
+            self.flush()
+            if options['flush']:
+                return
+        users = list(User.objects.filter(username__startswith=f'{PREFIX}-').order_by('id'))
+        if not users:
+            self.seed(options)
+            users = list(User.objects.filter(username__startswith=f'{PREFIX}-').order_by('id'))
+
+        # The test client's host, and no real mail for the alerts adjustments raise
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        ):
+            scenarios = {name: self.run_scenario(name, users, options) for name in options['scenarios']}
+
+        report = {
+            'commit': self.commit(),
+            'database': connection.vendor,
+            'created': timezone.now().isoformat(),
+            'dataset': {
+                'users': len(users),
+                'categories': Category.objects.filter(name__startswith=f'{PREFIX}-').count(),
+                'items': InventoryItem.objects.filter(owner__in=users).count(),
+                'suppliers': Supplier.objects.filter(owner__in=users).count(),
+                'logs': InventoryLog.objects.filter(item__owner__in=users).count(),
+            },
+            'requests': options['requests'],
+            'threads': options['threads'],
+            'scenarios': scenarios,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(username=f'{PREFIX}-{i}', password=password) for i in range(options['users'])
+        ])
+        categories = Category.objects.bulk_create([
+            Category(name=f'{PREFIX}-{i}') for i in range(options['categories'])
+        ])
+        suppliers = Supplier.objects.bulk_create([
+            Supplier(name=f'{PREFIX} supplier {i}', owner=users[i % len(users)]) for i in range(options['suppliers'])
+        ])
+        suppliers_by_owner = {}
+        for supplier in suppliers:
+            suppliers_by_owner.setdefault(supplier.owner_id, []).append(supplier)
+
+        items = InventoryItem.objects.bulk_create((
+            InventoryItem(
+                name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}', sku=f'BENCH-API-{i}',
+                description=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} for benchmarking',
+                quantity=rng.randint(0, 200), low_stock_threshold=rng.choice([5, 10, 20]),
+                price=Decimal(rng.randint(100, 50000)) / 100, category=rng.choice(categories),
+                owner=users[i % len(users)], location=f'{rng.choice("ABCDEF")}{rng.randint(1, 20)}'
+            )
+            for i in range(options['items'])
+        ), batch_size=BATCH_SIZE)
+        links = []
+        for item in items:
+            owned = suppliers_by_owner.get(item.owner_id, [])
+            for supplier in rng.sample(owned, k=min(rng.randint(0, 2), len(owned))):
+                links.append(InventoryItemSupplier(
+                    item=item, supplier=supplier, supplier_price=item.price / 2, lead_time_days=rng.randint(1, 21)
+                ))
+        InventoryItemSupplier.objects.bulk_create(links, batch_size=BATCH_SIZE)
+
+        now = timezone.now()
+        logs = (self.random_log(rng, rng.choice(items), now) for _ in range(options['logs']))
+        while batch := list(islice(logs, BATCH_SIZE)):
+            InventoryLog.objects.bulk_create(batch)
+
+        # Let the planner see the new rows before the first timed query
+        with connection.cursor() as cursor:
+            for model in [User, Category, Supplier, InventoryItem, InventoryItemSupplier, InventoryLog]:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        self.stderr.write(f"Seeded the benchmark dataset in {time.perf_counter() - started:.1f} s")
+
+    def random_log(self, rng, item, now):
+        action = rng.choice(['ADD', 'REMOVE', 'REMOVE', 'UPDATE'])
+        change = rng.randint(1, 20)
+        previous = rng.randint(change, 200)
+        return InventoryLog(
+            item=item, user_id=item.owner_id, action=action, quantity_change=change, previous_quantity=previous,
+            new_quantity=previous + change if action == 'ADD' else previous - change,
+            timestamp=now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)), notes='Benchmark'
+        )
+
+    def flush(self):
+        users = User.objects.filter(username__startswith=f'{PREFIX}-')
+        InventoryLog.objects.filter(item__owner__in=users).delete()
+        InventoryItem.objects.filter(owner__in=users).delete()
+        InventoryItemTombstone.objects.filter(owner__in=users).delete()
+        users.delete()
+        Category.objects.filter(name__startswith=f'{PREFIX}-').delete()
+
+    def commit(self):
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.strip()
+
+    def run_scenario(self, name, users, options):
+        rng = random.Random(f"{options['seed']}:{name}")
+        item_ids = {
+            user.id: list(InventoryItem.objects.filter(owner=user).values_list('id', flat=True)[:1000])
+            for user in users
+        }
+        users = [user for user in users if item_ids[user.id]]
+        page_size = api_settings.PAGE_SIZE
+        pages = {
+            owner_id: -(-count // page_size)
+            for owner_id, count in InventoryItem.objects.filter(owner__in=users).values_list('owner').annotate(
+                count=Count('id')
+            ).order_by()
+        }
+        tokens = {user.id: str(InventoryRefreshToken.for_user(user).access_token) for user in users}
+
+        def build(count):
+            requests = []
+            for _ in range(count):
+                user = rng.choice(users)
+                requests.append((tokens[user.id], self.request_for(name, rng, item_ids[user.id], pages[user.id])))
+            return requests
+
+        self.run(build(options['warmup']), 1)
+        result = {
+            'sequential': self.run(build(options['requests']), 1),
+            'concurrent': self.run(build(options['requests']), options['threads']),
+        }
+        self.stderr.write(
+            f"{name}: p50 {result['sequential']['p50_ms']} ms sequential, "
+            f"{result['concurrent']['requests_per_second']} req/s on {options['threads']} threads"
+        )
+        return result
+
+    def request_for(self, name, rng, item_ids, pages):
+        """
+        (method, path, params) of one request of the scenario.
+        """
+        if name == 'list':
+            return 'get', reverse('items-list'), {'page': rng.randint(1, min(pages, 20))}
+        if name == 'search':
+            return 'get', reverse('items-list'), {'search': f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'}
+        if name == 'low_stock':
+            return 'get', reverse('items-low-stock'), {}
+        if name == 'adjust_quantity':
+            path = reverse('items-adjust-quantity', args=[rng.choice(item_ids)])
+            return 'post', path, {'quantity_change': rng.choice([-3, -2, -1, 1, 2, 3])}
+        return 'get', reverse('logs-list'), {'page_size': 50}
+
+    def run(self, requests, threads):
+        """
+        Send the requests from `threads` threads and summarize the timings.
+        """
+        local = threading.local()
+        lock = threading.Lock()
+        samples = []
+
+        def send(request):
+            token, (method, path, params) = request
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            queries = []
+
+            def count_query(execute, *args):
+                queries.append(args[0])
+                return execute(*args)
+
+            with connection.execute_wrapper(count_query):
+                started = time.perf_counter()
+                if method == 'get':
+                    response = client.get(path, params)
+                else:
+                    response = client.post(path, params, format='json')
+                elapsed = time.perf_counter() - started
+            with lock:
+                samples.append((elapsed, len(queries), response.status_code < 400))
+
+        def worker(chunk):
+            try:
+                for request in chunk:
+                    send(request)
+            finally:
+                connections.close_all()
+
+        chunks = [requests[i::threads] for i in range(threads)]
+        started = time.perf_counter()
+        if threads == 1:
+            for request in requests:
+                send(request)
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(worker, chunks))
+        wall = time.perf_counter() - started
+        return self.summarize(samples, wall)
+
+    def summarize(self, samples, wall):
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, _, ok in samples if not ok),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'queries_per_request': round(statistics.fmean(queries for _, queries, _ in samples), 2),
+            'requests_per_second': round(len(samples) / wall, 1),
+        }
@@ -0,0 +1,52 @@
+from io import BytesIO
+
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from inventory.management.commands import benchmark_serializers
+from inventory.models import InventoryItem, InventoryLog
+from inventory.renderers import ORJSONParser, ORJSONRenderer
+from inventory.serializers import InventoryItemSerializer, InventoryLevelSerializer, InventoryLogSerializer
+
+
+class Command(benchmark_serializers.Command):
+    help = "Compare JSON rendering and parsing of item and log payloads with the stdlib and orjson"
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            self.create_rows(rows)
+            items = InventoryItem.objects.filter(owner__username='benchmark-serializers')
+            InventoryLog.objects.bulk_create([
+                InventoryLog(
+                    item=item, action='ADD', quantity_change=1, previous_quantity=item.quantity,
+                    new_quantity=item.quantity + 1, notes='Benchmark adjustment'
+                )
+                for item in items
+            ])
+            logs = InventoryLog.objects.filter(item__in=items).select_related('item', 'user')
+            payloads = {
+                'items': InventoryItemSerializer(InventoryItemSerializer.setup_eager_loading(items), many=True).data,
+                'level': InventoryLevelSerializer(InventoryLevelSerializer.setup_eager_loading(items), many=True).data,
+                'logs': InventoryLogSerializer(logs, many=True).data,
+            }
+            transaction.set_rollback(True)
+
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != body:
+                self.stderr.write(f"{name}: orjson output differs from JSONRenderer")
+            render = [
+                self.best(lambda: renderer.render(data), options['repeat'])
+                for renderer in [JSONRenderer(), ORJSONRenderer()]
+            ]
+            parse = [
+                self.best(lambda: parser.parse(BytesIO(body)), options['repeat'])
+                for parser in [JSONParser(), ORJSONParser()]
+            ]
+            self.stdout.write(
+                f"{name} ({len(body)} bytes): render {render[0] * 1e3:.2f} -> {render[1] * 1e3:.2f} ms "
+                f"({render[0] / render[1]:.1f}x), parse {parse[0] * 1e3:.2f} -> {parse[1] * 1e3:.2f} ms "
+                f"({parse[0] / parse[1]:.1f}x)"
+            )
@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.compiled import compile_serializer
+from inventory.models import Category, InventoryItem, InventoryItemSupplier, Supplier
+from inventory.serializers import InventoryItemSerializer, InventoryLevelSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare the per-row cost of the DRF and compiled item serializers on throwaway rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Items to create for the run")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per serializer; the best one is reported")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            self.create_rows(rows)
+            queryset = InventoryItem.objects.filter(owner__username='benchmark-serializers')
+            for serializer_class in [InventoryItemSerializer, InventoryLevelSerializer]:
+                eager = serializer_class.setup_eager_loading(queryset)
+                compiled = compile_serializer(serializer_class)
+                drf = self.best(lambda: serializer_class(eager, many=True).data, options['repeat'])
+                fast = self.best(lambda: compiled.data(queryset), options['repeat'])
+                self.stdout.write(
+                    f"{serializer_class.__name__}: DRF {drf / rows * 1e6:.1f} us/row, "
+                    f"compiled {fast / rows * 1e6:.1f} us/row ({drf / fast:.1f}x)"
+                )
+            transaction.set_rollback(True)
+
+    def create_rows(self, rows):
+        owner = User.objects.create(username='benchmark-serializers')
+        categories = Category.objects.bulk_create(
+            [Category(name=f'benchmark-serializers-{i}') for i in range(10)]
+        )
+        supplier = Supplier.objects.create(name='benchmark-serializers', owner=owner)
+        items = InventoryItem.objects.bulk_create([
+            InventoryItem(
+                name=f'Item {i}', sku=f'BENCH-SER-{i}', quantity=i % 80, price='9.99',
+                category=categories[i % len(categories)], owner=owner, location='A1'
+            )
+            for i in range(rows)
+        ])
+        InventoryItemSupplier.objects.bulk_create([
+            InventoryItemSupplier(item=item, supplier=supplier, supplier_price='4.50') for item in items
+        ])
+
+    def best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
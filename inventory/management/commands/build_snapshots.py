@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from inventory.snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = "Build daily stock snapshots from the inventory log rows added since the last run"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--until', help="Last day to build, as YYYY-MM-DD (default: yesterday)")
+        
+    def handle(self, *args, **options):
+        until = None
+        if options['until']:
+            until = parse_date(options['until'])
+            if until is None:
+                raise CommandError("--until must be a date in YYYY-MM-DD format")
+        written = build_snapshots(until)
+        self.stdout.write(f"Wrote {written} snapshot(s)")
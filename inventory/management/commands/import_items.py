@@ -0,0 +1,32 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.imports import IMPORT_FORMATS, detect_format, import_items
+
+
+class Command(BaseCommand):
+    help = "Upsert inventory items keyed by SKU from a CSV or JSON Lines file"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON Lines file to import")
+        parser.add_argument('--owner', required=True, help="Username that will own newly created items")
+        parser.add_argument('--type', choices=IMPORT_FORMATS, help="File format, detected from the extension by default")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per upsert batch")
+        
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['owner']}' does not exist")
+        
+        file_format = options['type'] or detect_format(options['path'])
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            result = import_items(stream, file_format, user, batch_size=options['batch_size'])
+        
+        self.stdout.write(json.dumps(result, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['rows']} rows ({result['created']} created, {result['updated']} updated, "
+            f"{result['error_count']} errors) at {result['rows_per_second']} rows/s"
+        ))
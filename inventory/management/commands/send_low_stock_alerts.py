@@ -0,0 +1,80 @@
+import logging
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import LowStockAlert
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send queued low stock alerts as one digest email per owner"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox instead of exiting")
+        parser.add_argument('--interval', type=int, default=60, help="Seconds between polls when --loop is set")
+        parser.add_argument('--batch-size', type=int, default=500, help="Maximum alerts to process per run")
+        
+    def handle(self, *args, **options):
+        while True:
+            sent = self.send_pending(options['batch_size'])
+            if sent:
+                self.stdout.write(f"Sent {sent} low stock digest(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+            
+    def send_pending(self, batch_size):
+        """
+        Mail each owner with pending alerts their digest, one owner at a time:
+        their alerts are locked, mailed and marked sent in one transaction, so
+        a failed send leaves only that owner's alerts for the next pass.
+        """
+        owner_ids = dict.fromkeys(
+            LowStockAlert.objects
+            .filter(sent_at__isnull=True, resolved_at__isnull=True)
+            .order_by('created_at')
+            .values_list('owner_id', flat=True)[:batch_size]
+        )
+        connection = get_connection()
+        sent = 0
+        for owner_id in owner_ids:
+            try:
+                sent += self.send_digest(connection, owner_id, batch_size)
+            except Exception:
+                logger.exception("Sending the low stock digest to owner %s failed", owner_id)
+        return sent
+    
+    def send_digest(self, connection, owner_id, batch_size):
+        with transaction.atomic():
+            alerts = list(
+                LowStockAlert.objects
+                .select_for_update(skip_locked=True, of=('self',))
+                .filter(owner_id=owner_id, sent_at__isnull=True, resolved_at__isnull=True)
+                .select_related('item', 'owner')
+                .order_by('created_at')[:batch_size]
+            )
+            if not alerts:
+                return 0
+            
+            owner = alerts[0].owner
+            sent = 0
+            if owner is not None and owner.email:
+                lines = [
+                    f"- {alert.item.name}: {alert.quantity} in stock (threshold {alert.threshold})"
+                    for alert in alerts
+                ]
+                EmailMessage(
+                    subject=f"Low Stock Alert: {len(alerts)} item(s) below threshold",
+                    body="The following items are at or below their low stock threshold:\n\n" + "\n".join(lines),
+                    from_email='noreply@inventory.com',
+                    to=[owner.email],
+                    connection=connection
+                ).send()
+                sent = 1
+            LowStockAlert.objects.filter(id__in=[alert.id for alert in alerts]).update(sent_at=timezone.now())
+        return sent
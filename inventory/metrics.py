@@ -0,0 +1,270 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+# Anything else is labelled OTHER, so clients can't mint label values
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+# Timings of the request being handled, if any
+current_request = ContextVar('inventory_metrics_request', default=None)
+
+
+def escape_label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+
+    def observe(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def samples(self):
+        for labels, value in sorted(self.series.items()):
+            yield f'{self.name}{format_labels(self.labels, labels)} {format_number(value)}'
+
+
+class Histogram(Counter):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels, buckets):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            # One count per bucket plus +Inf, then the sum
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, '+Inf'], series):
+                cumulative += count
+                le = [('le', bound if bound == '+Inf' else format_number(float(bound)))]
+                yield f'{self.name}_bucket{format_labels(self.labels, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{format_labels(self.labels, labels)} {format_number(series[-1])}'
+            yield f'{self.name}_count{format_labels(self.labels, labels)} {cumulative}'
+
+
+class Registry:
+    """
+    Process-local request metrics, rendered in the Prometheus text format.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = Counter(
+                'inventory_requests_total', 'Requests handled.', ('view', 'method', 'status')
+            )
+            self.duration = Histogram(
+                'inventory_request_duration_seconds', 'Time to produce the response.',
+                ('view', 'method'), LATENCY_BUCKETS
+            )
+            self.queries = Histogram(
+                'inventory_db_queries', 'Database queries per request.', ('view',), QUERY_COUNT_BUCKETS
+            )
+            self.db_duration = Histogram(
+                'inventory_db_duration_seconds', 'Time spent in database queries per request.',
+                ('view',), LATENCY_BUCKETS
+            )
+            self.serialization = Histogram(
+                'inventory_serialization_duration_seconds',
+                'Time spent in compiled serializers and rendering the response body per request.',
+                ('view',), LATENCY_BUCKETS
+            )
+            self.response_size = Histogram(
+                'inventory_response_size_bytes', 'Size of non-streaming response bodies.', ('view',), SIZE_BUCKETS
+            )
+
+    def metrics(self):
+        return [self.requests, self.duration, self.queries, self.db_duration, self.serialization, self.response_size]
+
+    def record(self, timings, response):
+        view, method = timings.view, timings.method
+        with self._lock:
+            self.requests.observe((view, method, response.status_code))
+            self.duration.observe((view, method), timings.duration)
+            self.queries.observe((view,), timings.queries)
+            self.db_duration.observe((view,), timings.db_time)
+            self.serialization.observe((view,), timings.serialization_time)
+            if not response.streaming:
+                self.response_size.observe((view,), len(response.content))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for metric in self.metrics():
+                lines.append(f'# HELP {metric.name} {metric.documentation}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    def __init__(self, request):
+        self.method = request.method if request.method in METHODS else 'OTHER'
+        self.view = 'unmatched'
+        self.started = time.perf_counter()
+        self.duration = 0
+        self.queries = 0
+        self.db_time = 0
+        self.serialization_time = 0
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper adding each query to the current request's timings. The
+    ContextVar follows the request onto sync_to_async threads, so queries on
+    their connections are counted too.
+    """
+    timings = current_request.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db_time += time.perf_counter() - started
+
+
+def install_query_counter(sender, connection, **kwargs):
+    # Wrappers outlive reconnects of the same connection object
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Add the time spent in the block to the current request's serialization time.
+    """
+    timings = current_request.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.serialization_time += time.perf_counter() - started
+
+
+def view_name(view_func, method):
+    """
+    `ViewSet.action` for viewset routes, the class or function name otherwise.
+    """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', type(view_func).__name__)
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return f'{cls.__name__}.{action}' if action else cls.__name__
+
+
+class MetricsMiddleware:
+    """
+    Records latency, database queries and time, serialization time and
+    response size of each request per view, and warns about requests that
+    run more than INVENTORY_QUERY_BUDGET queries (0 turns the check off).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Keep Django from hopping to a thread to call the sync hook
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings(request)
+        token = current_request.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, timings, response)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings(request)
+        token = current_request.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, timings, response)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before a DRF Response is rendered into its body
+        timings = current_request.get()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timings.serialization_time += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return MetricsMiddleware.process_template_response(self, request, response)
+
+    def finish(self, request, timings, response):
+        if request.resolver_match is not None:
+            timings.view = view_name(request.resolver_match.func, request.method)
+        timings.duration = time.perf_counter() - timings.started
+        registry.record(timings, response)
+        budget = settings.INVENTORY_QUERY_BUDGET
+        if budget and timings.queries > budget:
+            logger.warning(
+                "%s %s (%s) ran %d queries, over the budget of %d",
+                request.method, request.path, timings.view, timings.queries, budget
+            )
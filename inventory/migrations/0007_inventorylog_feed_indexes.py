@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 01:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_lowstockalert'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorylog',
+            index=models.Index(fields=['-timestamp', '-id'], name='inventorylog_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorylog',
+            index=models.Index(fields=['item', '-timestamp', '-id'], name='inventorylog_item_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 01:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_inventorylog_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['owner', 'name'], name='inventoryitem_owner_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['owner', 'price'], name='inventoryitem_owner_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['location'], name='inventoryitem_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('quantity__lt', models.F('low_stock_threshold'))), fields=['owner', 'name'], name='inventoryitem_low_stock_idx'),
+        ),
+    ]
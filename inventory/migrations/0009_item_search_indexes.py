@@ -0,0 +1,78 @@
+# Generated by Django 5.1.7 on 2026-10-18 01:51
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def search_index():
+    # Keep in sync with inventory.search.SEARCH_VECTOR
+    return GinIndex(
+        SearchVector('name', weight='A', config='simple') +
+        SearchVector('sku', weight='A', config='simple') +
+        SearchVector('description', weight='B', config='simple'),
+        name='inventoryitem_search_idx'
+    )
+
+
+def create_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        InventoryItem = apps.get_model('inventory', 'InventoryItem')
+        schema_editor.add_index(InventoryItem, search_index())
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            has_trigram = cursor.fetchone() is not None
+        if has_trigram:
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                "CREATE INDEX IF NOT EXISTS inventoryitem_sku_trgm_idx "
+                "ON inventory_inventoryitem USING gin (upper(sku) gin_trgm_ops)"
+            )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE inventory_item_fts USING fts5("
+            "name, sku, description, content='inventory_inventoryitem', content_rowid='id', "
+            "tokenize=\"unicode61 tokenchars '-_'\")"
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem BEGIN "
+            "INSERT INTO inventory_item_fts(rowid, name, sku, description) "
+            "VALUES (new.id, new.name, new.sku, new.description); END"
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER inventory_item_fts_ad AFTER DELETE ON inventory_inventoryitem BEGIN "
+            "INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, sku, description) "
+            "VALUES ('delete', old.id, old.name, old.sku, old.description); END"
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER inventory_item_fts_au AFTER UPDATE ON inventory_inventoryitem BEGIN "
+            "INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, sku, description) "
+            "VALUES ('delete', old.id, old.name, old.sku, old.description); "
+            "INSERT INTO inventory_item_fts(rowid, name, sku, description) "
+            "VALUES (new.id, new.name, new.sku, new.description); END"
+        )
+        schema_editor.execute("INSERT INTO inventory_item_fts(inventory_item_fts) VALUES ('rebuild')")
+
+
+def drop_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        InventoryItem = apps.get_model('inventory', 'InventoryItem')
+        schema_editor.remove_index(InventoryItem, search_index())
+        schema_editor.execute("DROP INDEX IF EXISTS inventoryitem_sku_trgm_idx")
+    elif vendor == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS inventory_item_fts_{trigger}")
+        schema_editor.execute("DROP TABLE IF EXISTS inventory_item_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_inventoryitem_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_structures, drop_search_structures),
+    ]
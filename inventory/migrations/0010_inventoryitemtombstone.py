@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_item_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryItemTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.IntegerField()),
+                ('sku', models.CharField(blank=True, max_length=50, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['owner', 'last_updated', 'id'], name='inventoryitem_owner_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['last_updated', 'id'], name='inventoryitem_sync_idx'),
+        ),
+        migrations.AddField(
+            model_name='inventoryitemtombstone',
+            name='owner',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitemtombstone',
+            index=models.Index(fields=['owner', 'deleted_at', 'id'], name='tombstone_owner_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitemtombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:31
+
+from importlib import import_module
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+search_migration = import_module('inventory.migrations.0009_item_search_indexes')
+
+
+# SQLite adds a stored generated column by rebuilding the table, which drops
+# the full-text triggers, so take the search structures down around it.
+def drop_sqlite_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search_migration.drop_search_structures(apps, schema_editor)
+
+
+def create_sqlite_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search_migration.create_search_structures(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_inventoryitemtombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sqlite_search, create_sqlite_search),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='stock_status',
+            field=models.GeneratedField(choices=[(0, 'Out of Stock'), (1, 'Low Stock'), (2, 'Medium Stock'), (3, 'In Stock')], db_persist=True, expression=models.Case(models.When(quantity__lte=0, then=models.Value(0)), models.When(quantity__lte=models.F('low_stock_threshold'), then=models.Value(1)), models.When(quantity__lte=django.db.models.expressions.CombinedExpression(models.F('low_stock_threshold'), '*', models.Value(2)), then=models.Value(2)), default=models.Value(3)), output_field=models.PositiveSmallIntegerField(), verbose_name='stock status'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['owner', 'stock_status'], name='inventoryitem_owner_status_idx'),
+        ),
+        migrations.RunPython(create_sqlite_search, drop_sqlite_search),
+    ]
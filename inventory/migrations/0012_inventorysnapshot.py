@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_inventoryitem_stock_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField()),
+                ('value', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventoryitem')),
+            ],
+            options={
+                'ordering': ['item', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('item', 'date'), name='inventorysnapshot_item_date_uniq')],
+            },
+        ),
+    ]
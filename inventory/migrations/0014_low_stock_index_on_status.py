@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_claimsuser'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventoryitem',
+            name='inventoryitem_low_stock_idx',
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('stock_status__lte', 1)), fields=['owner', 'name'], name='inventoryitem_low_stock_idx'),
+        ),
+    ]
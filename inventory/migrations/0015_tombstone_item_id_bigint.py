@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_low_stock_index_on_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryitemtombstone',
+            name='item_id',
+            field=models.BigIntegerField(),
+        ),
+    ]
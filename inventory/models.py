@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import models, router
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
+from .cache import invalidate, item_scopes, user_rows
+from . import events
 
  
 class Category(models.Model):
@@ -19,6 +20,17 @@ class Category(models.Model):
     class meta:
         verbose_name_plural = 'Categories'
     
+class StockStatus(models.IntegerChoices):
+    """
+    Stock level buckets, ordered from most to least urgent. Items at or below
+    their low_stock_threshold are low; up to twice the threshold is medium.
+    """
+    OUT = 0, 'Out of Stock'
+    LOW = 1, 'Low Stock'
+    MEDIUM = 2, 'Medium Stock'
+    IN = 3, 'In Stock'
+
+
 class InventoryItem(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -31,6 +43,21 @@ class InventoryItem(models.Model):
     low_stock_threshold = models.PositiveIntegerField(default=10, help_text="Minimum stock level before alert")
     date_added = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
+    # Computed and stored by the database so it can be filtered, ordered and indexed
+    stock_status = models.GeneratedField(
+        expression=models.Case(
+            models.When(quantity__lte=0, then=models.Value(StockStatus.OUT.value)),
+            models.When(quantity__lte=models.F('low_stock_threshold'), then=models.Value(StockStatus.LOW.value)),
+            models.When(
+                quantity__lte=models.F('low_stock_threshold') * 2, then=models.Value(StockStatus.MEDIUM.value)
+            ),
+            default=models.Value(StockStatus.IN.value),
+        ),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+        choices=StockStatus.choices,
+        verbose_name='stock status',
+    )
     
     def __str__(self):
         return self.name
@@ -38,8 +65,37 @@ class InventoryItem(models.Model):
     def is_low_stock(self):
         return self.quantity <= self.low_stock_threshold
     
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # An UPDATE doesn't return the recomputed value; reload it on access
+            self.__dict__.pop('stock_status', None)
+    
     class Meta:
-        ordering = ['name']    
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['owner', 'name'], name='inventoryitem_owner_name_idx'),
+            models.Index(fields=['owner', 'price'], name='inventoryitem_owner_price_idx'),
+            models.Index(fields=['location'], name='inventoryitem_location_idx'),
+            # Only low stock rows, so the low-stock listing stays small however large the catalog grows
+            models.Index(
+                fields=['owner', 'name'],
+                condition=models.Q(stock_status__lte=StockStatus.LOW),
+                name='inventoryitem_low_stock_idx'
+            ),
+            # Delta sync scans, per owner and catalog-wide
+            models.Index(fields=['owner', 'last_updated', 'id'], name='inventoryitem_owner_sync_idx'),
+            models.Index(fields=['last_updated', 'id'], name='inventoryitem_sync_idx'),
+            models.Index(fields=['owner', 'stock_status'], name='inventoryitem_owner_status_idx'),
+        ]
+
+
+# SQL counterpart of InventoryItem.is_low_stock(), for annotating querysets
+# that never build model instances
+IS_LOW_STOCK = models.ExpressionWrapper(
+    models.Q(stock_status__lte=StockStatus.LOW), output_field=models.BooleanField()
+)
 
 
 class InventoryLog(models.Model):
@@ -63,6 +119,10 @@ class InventoryLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='inventorylog_feed_idx'),
+            models.Index(fields=['item', '-timestamp', '-id'], name='inventorylog_item_feed_idx'),
+        ]
         
 
 class Supplier(models.Model):
@@ -97,16 +157,199 @@ class InventoryItemSupplier(models.Model):
         unique_together = ('item', 'supplier')                
 
 
-# Signal to send email alert when stock is low
+class LowStockAlert(models.Model):
+    """
+    Outbox row recording that an item crossed its low stock threshold. Rows are
+    written alongside the item save and mailed later by the send_low_stock_alerts
+    command, batched per owner.
+    """
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='low_stock_alerts')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name='low_stock_alerts')
+    quantity = models.IntegerField()
+    threshold = models.PositiveIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    resolved_at = models.DateTimeField(blank=True, null=True, help_text="Set once stock is back above the threshold")
+    
+    def __str__(self):
+        return f"Low stock alert for {self.item.name}"
+    
+    class Meta:
+        ordering = ['created_at']
+
+
+class InventoryItemTombstone(models.Model):
+    """
+    Record of a deleted InventoryItem so delta sync clients can drop their copy.
+    """
+    item_id = models.BigIntegerField()
+    sku = models.CharField(max_length=50, blank=True, null=True)
+    # No database constraint: tombstones are written while the owner itself may
+    # be in the middle of being deleted.
+    owner = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+'
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Deleted item {self.item_id}"
+    
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['owner', 'deleted_at', 'id'], name='tombstone_owner_sync_idx'),
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_sync_idx'),
+        ]
+
+
+class InventorySnapshot(models.Model):
+    """
+    An item's closing stock on a day its quantity changed, built from the
+    inventory log by the build_snapshots command. Days without changes have no
+    row; the previous snapshot carries over.
+    """
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='snapshots')
+    date = models.DateField()
+    quantity = models.IntegerField()
+    # At the item's price when the snapshot was built
+    value = models.DecimalField(max_digits=20, decimal_places=2)
+    
+    def __str__(self):
+        return f"{self.item_id} on {self.date}: {self.quantity}"
+    
+    class Meta:
+        ordering = ['item', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'date'], name='inventorysnapshot_item_date_uniq'),
+        ]
+
+
+class ClaimsUser(User):
+    """
+    The request user of stateless JWT authentication, built from the access
+    token's claims without a query. Only id, username, is_staff and is_active
+    are set; reading any other field fills them all in from the cached User
+    row, or from the database on a miss.
+    """
+    class Meta:
+        proxy = True
+    
+    @classmethod
+    def from_claims(cls, user_id, username, is_staff):
+        return cls.from_db(
+            router.db_for_read(User), ['id', 'username', 'is_staff', 'is_active'], [user_id, username, is_staff, True]
+        )
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is None or from_queryset is not None or not deferred.issuperset(fields):
+            return super().refresh_from_db(using, fields, from_queryset)
+        row = user_rows.get(self.pk)
+        if row is None:
+            row = User.objects.get(pk=self.pk)
+            user_rows.set(self.pk, row)
+        for attname in deferred:
+            setattr(self, attname, getattr(row, attname))
+
+
+def sync_low_stock_alerts(items):
+    """
+    Queue a LowStockAlert for every item that has just dropped to or below its
+    threshold and resolve open alerts for items that have recovered. Works on a
+    batch so bulk writes, which skip post_save, can keep the outbox in step.
+    """
+    items = list(items)
+    if not items:
+        return
+    open_item_ids = set(
+        LowStockAlert.objects.filter(item__in=items, resolved_at__isnull=True).order_by().values_list('item_id', flat=True)
+    )
+    new_alerts = [
+        LowStockAlert(
+            item=item,
+            owner_id=item.owner_id,
+            quantity=item.quantity,
+            threshold=item.low_stock_threshold
+        )
+        for item in items if item.is_low_stock() and item.id not in open_item_ids
+    ]
+    recovered = [item.id for item in items if not item.is_low_stock() and item.id in open_item_ids]
+    if new_alerts:
+        LowStockAlert.objects.bulk_create(new_alerts)
+    if recovered:
+        LowStockAlert.objects.filter(item_id__in=recovered, resolved_at__isnull=True).update(resolved_at=timezone.now())
+    for alert in new_alerts:
+        events.publish(alert.owner_id, events.stock_event('low_stock', alert.item))
+    for item in items:
+        if item.id in recovered:
+            events.publish(item.owner_id, events.stock_event('stock_recovered', item))
+
+
+# Signal to queue a low stock alert once per threshold crossing
 @receiver(post_save, sender=InventoryItem)
 def check_low_stock(sender, instance, **kwargs):
-    if instance.is_low_stock():
-        send_mail(
-            subject=f"Low Stock Alert for {instance.name}",
-            message=f"The stock level for {instance.name} is below the threshold. Current quantity: {instance.quantity}.",
-            from_email='noreply@inventory.com',
-            recipient_list=[instance.owner.email],
-            fail_silently=False
-        )
-        
-        
\ No newline at end of file
+    sync_low_stock_alerts([instance])
+
+
+@receiver(post_delete, sender=InventoryItem)
+def record_item_tombstone(sender, instance, **kwargs):
+    InventoryItemTombstone.objects.create(item_id=instance.pk, sku=instance.sku, owner_id=instance.owner_id)
+
+
+def publish_log_events(logs):
+    """
+    Push InventoryLog entries to the owners' event streams. Bulk writes, which
+    skip signals, call this directly.
+    """
+    for log in logs:
+        events.publish(log.item.owner_id, events.log_event(log))
+
+
+@receiver(post_save, sender=InventoryLog)
+def publish_log_event(sender, instance, created, **kwargs):
+    if created:
+        publish_log_events([instance])
+
+
+def invalidate_item_caches(owner_ids):
+    """
+    Invalidate cached data covering items of these owners. Bulk writes, which
+    skip signals, call this directly.
+    """
+    invalidate(*item_scopes(set(owner_ids)))
+
+
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+def invalidate_item_cache(sender, instance, **kwargs):
+    invalidate_item_caches([instance.owner_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+@receiver(post_delete, sender=ClaimsUser)
+def invalidate_user_row(sender, instance, **kwargs):
+    user_rows.pop(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ClaimsUser)
+def invalidate_deleted_user_caches(sender, instance, **kwargs):
+    # Cached responses and validators are keyed by user id; orphan this
+    # user's before the id can be reused
+    invalidate(*item_scopes([instance.pk]))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    invalidate('categories')
+
+
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_save, sender=InventoryItemSupplier)
+@receiver(post_delete, sender=InventoryItemSupplier)
+def invalidate_supplier_cache(sender, instance, **kwargs):
+    invalidate('suppliers')
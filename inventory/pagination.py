@@ -0,0 +1,145 @@
+import contextlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ClientPageSizeMixin:
+    """
+    Lets clients pick the page size with ?page_size=, capped at
+    INVENTORY_MAX_PAGE_SIZE. Reads request.GET so it also works for plain
+    Django requests in the async views.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'INVENTORY_MAX_PAGE_SIZE', 500)
+
+    def get_page_size(self, request):
+        with contextlib.suppress(KeyError, ValueError):
+            return _positive_int(request.GET[self.page_size_query_param], strict=True, cutoff=self.max_page_size)
+        return self.page_size
+
+
+class PageSizePagination(ClientPageSizeMixin, PageNumberPagination):
+    """
+    Page number pagination with a client-selectable page size.
+    """
+
+
+class KeysetPagination(ClientPageSizeMixin, BasePagination):
+    """
+    Cursor pagination on a (timestamp, id) key. Each page is a range scan that
+    starts right after the previous page's last row, so deep pages cost the same
+    as the first one and no COUNT(*) is issued. Both newest-first and
+    oldest-first ordering of the timestamp field are supported.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    timestamp_field = 'timestamp'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+    
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        The queryset for the requested page plus one row to tell whether more
+        follow. Evaluate it and hand the rows to set_page(); split in two so the
+        rows can also be fetched with async iteration.
+        """
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.descending = self.get_descending(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            self.reverse = False
+        else:
+            timestamp, pk, self.reverse = self.cursor
+            # Walking backwards (previous page) flips the comparison and ordering.
+            before = self.descending != self.reverse
+            lookup = 'lt' if before else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.timestamp_field}__{lookup}': timestamp}) |
+                Q(**{self.timestamp_field: timestamp, f'id__{lookup}': pk})
+            )
+        ascending = self.descending == self.reverse
+        prefix = '' if ascending else '-'
+        queryset = queryset.order_by(f'{prefix}{self.timestamp_field}', f'{prefix}id')
+        return queryset[:self.limit + 1]
+    
+    def set_page(self, results):
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if self.reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.page = results
+        return results
+
+    def get_descending(self, request, queryset, view):
+        ordering = request.GET.get(api_settings.ORDERING_PARAM)
+        if ordering:
+            return not ordering.split(',')[0].strip() == self.timestamp_field
+        return True
+
+    def decode_cursor(self, request):
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            timestamp, pk, reverse = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            timestamp = parse_datetime(timestamp)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, pk, reverse == '1'
+
+    def encode_cursor(self, obj, reverse):
+        timestamp = getattr(obj, self.timestamp_field)
+        raw = f"{timestamp.isoformat()}|{obj.pk}|{1 if reverse else 0}"
+        return replace_query_param(self.base_url, self.cursor_query_param, urlsafe_b64encode(raw.encode('ascii')).decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -1,3 +1,6 @@
+import hmac
+
+from django.conf import settings
 from rest_framework import permissions
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -15,4 +18,13 @@ class IsOwner(permissions.BasePermission):
     Custom permission to only allow owners of an object.
     """
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user
\ No newline at end of file
+        return obj.owner == request.user
+
+class HasMetricsToken(permissions.BasePermission):
+    """
+    Allow scrapers sending `Authorization: Token <INVENTORY_METRICS_TOKEN>`.
+    """
+    def has_permission(self, request, view):
+        token = settings.INVENTORY_METRICS_TOKEN
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        return bool(token) and scheme == 'Token' and hmac.compare_digest(credentials.encode(), token.encode())
@@ -0,0 +1,64 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dates, times and decimals go through DRF's encoder so the output matches
+# JSONRenderer byte for byte; orjson would otherwise format them itself.
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def require_orjson():
+    if orjson is None:
+        raise ImproperlyConfigured("The orjson renderer and parser need the orjson package installed")
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer that encodes with orjson. Indented, non-compact or
+    ASCII-only output, and payloads orjson can't represent (such as integers
+    wider than 64 bits), fall back to the stdlib encoder.
+    """
+    def __init__(self):
+        require_orjson()
+        self.encoder = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape \u2028 and \u2029 as JSONRenderer does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser that decodes UTF-8 bodies with orjson. NaN and Infinity are
+    always rejected.
+    """
+    renderer_class = ORJSONRenderer
+
+    def __init__(self):
+        require_orjson()
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,148 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from .models import Category
+
+FTS_TABLE = 'inventory_item_fts'
+
+# Must stay identical to the expression indexed in migration 0009 so PostgreSQL
+# can answer the match from the GIN index.
+SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config='simple') +
+    SearchVector('sku', weight='A', config='simple') +
+    SearchVector('description', weight='B', config='simple')
+)
+
+TOKEN_RE = re.compile(r'[\w-]+')
+
+
+def search_tokens(term):
+    return TOKEN_RE.findall(term.lower())
+
+
+def category_match(term):
+    # Categories are a short table, so resolving matching names up front and
+    # filtering items by category_id keeps the item side on an index instead of
+    # an ILIKE join.
+    category_ids = list(Category.objects.filter(name__icontains=term).values_list('id', flat=True))
+    if not category_ids:
+        return Q()
+    return Q(category_id__in=category_ids)
+
+
+def sku_prefix_match(term):
+    # A single token may be the start of a SKU; the sku index answers that
+    # with a range scan, next to whatever the backend matches
+    if ' ' in term:
+        return Q()
+    return Q(sku__startswith=term)
+
+
+class BaseSearchBackend:
+    """
+    Narrows an item queryset to the rows matching a search term and annotates
+    a `search_rank` to order them by.
+    """
+    def search(self, queryset, term):
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Weighted full-text search over name, sku and description backed by a GIN
+    expression index, plus pg_trgm fuzzy SKU matching when the extension exists.
+    """
+    def __init__(self):
+        self._has_trigram = None
+
+    def has_trigram(self):
+        if self._has_trigram is None:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                self._has_trigram = cursor.fetchone() is not None
+        return self._has_trigram
+
+    def search(self, queryset, term):
+        tokens = search_tokens(term)
+        if not tokens:
+            return queryset.none()
+        query = SearchQuery(' & '.join(f"'{token}':*" for token in tokens), search_type='raw', config='simple')
+        match = Q(search=query) | category_match(term) | sku_prefix_match(term)
+        if self.has_trigram():
+            # Fuzzy SKU match through the upper(sku) gin_trgm_ops index
+            match |= RawSQL(
+                'upper("inventory_inventoryitem"."sku") %% upper(%s)', [term], output_field=BooleanField()
+            )
+        return queryset.annotate(
+            search=SEARCH_VECTOR,
+            search_rank=SearchRank(SEARCH_VECTOR, query)
+        ).filter(match).order_by('-search_rank', 'name')
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    FTS5 fallback used for local development and tests. The external content
+    table is kept in sync with inventory_inventoryitem by triggers.
+    """
+    def search(self, queryset, term):
+        tokens = search_tokens(term)
+        if not tokens:
+            return queryset.none()
+        match = ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 10.0, 10.0, 4.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = inventory_inventoryitem.id",
+            [match]
+        )
+        matched_ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        return queryset.filter(Q(id__in=matched_ids) | category_match(term) | sku_prefix_match(term)).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', 'name')
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Return the configured backend (INVENTORY_SEARCH_BACKEND, a dotted path) or
+    the one matching the database vendor. None means plain SearchFilter.
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'INVENTORY_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor in BACKENDS:
+            _backend = BACKENDS[connection.vendor]()
+        else:
+            _backend = False
+    return _backend or None
+
+
+class InventorySearchFilter(filters.SearchFilter):
+    """
+    SearchFilter for inventory items: the search backend, falling back to
+    SearchFilter's icontains scan when none applies.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        backend = get_search_backend()
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, ' '.join(terms))
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Category, InventoryItem, InventoryLog, InventoryItemSupplier, Supplier
+from django.db.models import Prefetch
+from .models import (
+    Category, InventoryItem, InventoryItemTombstone, InventoryLog, InventoryItemSupplier, Supplier, IS_LOW_STOCK
+)
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -72,12 +75,61 @@ class InventoryItemSupplierSerializer(serializers.ModelSerializer):
         model = InventoryItemSupplier
         fields = '__all__'
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+def split_field_names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Serializer that can be narrowed to the fields a client asks for with
+    ?fields=a,b. Fields in `expandable_fields` can also be added to a sparse
+    response with ?expand=.
+    """
+    expandable_fields = ()
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+                
+    @classmethod
+    def get_sparse_fields(cls, query_params):
+        """
+        Names of the fields requested, in declaration order, or None when the
+        client didn't restrict them.
+        """
+        requested = split_field_names(query_params.get('fields'))
+        expand = split_field_names(query_params.get('expand'))
+        unknown = [name for name in expand if name not in cls.expandable_fields]
+        if unknown:
+            raise serializers.ValidationError({'expand': f"Can't expand: {', '.join(unknown)}"})
+        if not requested:
+            return None
+        available = cls.Meta.fields
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+        return tuple(name for name in available if name in requested or name in expand)
+
+
+class InventoryItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner_username = serializers.ReadOnlyField(source='owner.username')
     category_name = serializers.ReadOnlyField(source='category.name')
     suppliers = InventoryItemSupplierSerializer(many=True, read_only=True)
     is_low_stock = serializers.SerializerMethodField()
     
+    # Used by the compiled list path in place of the method fields
+    sql_fields = {'is_low_stock': IS_LOW_STOCK}
+    expandable_fields = ('suppliers',)
+    # Columns each field reads, where they aren't just the field itself
+    field_columns = {
+        'category_name': ['category__name'],
+        'owner_username': ['owner__username'],
+        'suppliers': [],
+        'is_low_stock': ['quantity', 'low_stock_threshold'],
+    }
+    
     class Meta:
         model = InventoryItem
         fields = [
@@ -86,6 +138,25 @@ class InventoryItemSerializer(serializers.ModelSerializer):
             'date_added', 'last_updated', 'is_low_stock'
         ]
         read_only_fields = ['id', 'date_added', 'last_updated']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Load the columns, owner, category and nested suppliers used by this
+        serializer (or just by `fields`) in a fixed number of queries.
+        """
+        fields = cls.Meta.fields if fields is None else fields
+        columns = ['id'] + [column for name in fields for column in cls.field_columns.get(name, [name])]
+        relations = [
+            relation for relation in ('owner', 'category')
+            if any(column.startswith(f'{relation}__') for column in columns)
+        ]
+        queryset = queryset.select_related(*relations).only(*dict.fromkeys(columns))
+        if 'suppliers' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('suppliers', queryset=InventoryItemSupplier.objects.select_related('supplier').order_by('id'))
+            )
+        return queryset
         
     def get_is_low_stock(self, obj):
         return obj.is_low_stock()
@@ -103,7 +174,7 @@ class InventoryItemCreateUpdateSerializer(serializers.ModelSerializer):
 
 class InventoryLevelSerializer(serializers.ModelSerializer):
     category_name = serializers.ReadOnlyField(source='category.name')
-    stock_status = serializers.SerializerMethodField()
+    stock_status = serializers.ReadOnlyField(source='get_stock_status_display')
     
     class Meta:
         model = InventoryItem
@@ -112,12 +183,30 @@ class InventoryLevelSerializer(serializers.ModelSerializer):
             'location', 'price', 'stock_status', 'last_updated'
         ]
     
-    def get_stock_status(self, obj):
-        if obj.quantity <= 0:
-            return "Out of Stock"
-        elif obj.quantity < 20: 
-            return "Low Stock"
-        elif obj.quantity < 50: 
-            return "Medium Stock"
-        else:
-            return "In Stock"                
\ No newline at end of file
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('category').only(
+            'id', 'name', 'sku', 'quantity', 'category__name',
+            'location', 'price', 'stock_status', 'last_updated'
+        )
+
+class BulkAdjustmentSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    sku = serializers.CharField(required=False)
+    quantity_change = serializers.IntegerField()
+    notes = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if 'id' not in data and 'sku' not in data:
+            raise serializers.ValidationError("Either id or sku is required")
+        if data['quantity_change'] == 0:
+            raise serializers.ValidationError("quantity_change cannot be zero")
+        return data
+
+
+class InventoryItemTombstoneSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='item_id')
+    
+    class Meta:
+        model = InventoryItemTombstone
+        fields = ['id', 'sku', 'deleted_at']
@@ -0,0 +1,171 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import InventoryItem, InventoryLog, InventorySnapshot
+
+HISTORY_BUCKETS = ('day', 'week', 'month')
+
+MAX_HISTORY_DAYS = 731
+
+SNAPSHOT_BATCH_SIZE = 1000
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def closing_quantities(logs):
+    """
+    The last new_quantity per (item id, local date) of a log queryset.
+    """
+    closing = {}
+    rows = logs.order_by('timestamp', 'id').values_list('item_id', 'timestamp', 'new_quantity')
+    for item_id, timestamp, quantity in rows.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+        closing[item_id, timezone.localdate(timestamp)] = quantity
+    return closing
+
+
+def build_snapshots(until=None, batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Write the closing quantity of every item changed on each complete day up
+    to `until` (yesterday by default), starting from the last day already
+    built, which is rebuilt in case it was built while still open. Only log
+    rows since then are read, `batch_size` at a time in (timestamp, id)
+    order; a later batch overwrites the closing an earlier one wrote for the
+    same item and day. Returns the number of snapshot rows written.
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    logs = InventoryLog.objects.filter(timestamp__lt=day_start(until + timedelta(days=1)))
+    last_built = InventorySnapshot.objects.aggregate(last=Max('date'))['last']
+    if last_built:
+        logs = logs.filter(timestamp__gte=day_start(last_built))
+
+    written = 0
+    batch = logs
+    while rows := list(
+        batch.order_by('timestamp', 'id').values_list('id', 'timestamp', 'item_id', 'new_quantity')[:batch_size]
+    ):
+        closing = {(item_id, timezone.localdate(timestamp)): quantity for _, timestamp, item_id, quantity in rows}
+        written += write_snapshots(closing)
+        last_id, last_timestamp = rows[-1][:2]
+        batch = logs.filter(Q(timestamp__gt=last_timestamp) | Q(timestamp=last_timestamp, id__gt=last_id))
+    return written
+
+
+def write_snapshots(closing):
+    prices = dict(InventoryItem.objects.filter(id__in={item_id for item_id, _ in closing}).values_list('id', 'price'))
+    snapshots = [
+        InventorySnapshot(item_id=item_id, date=day, quantity=quantity, value=quantity * prices[item_id])
+        for (item_id, day), quantity in closing.items()
+        # Logs of items deleted since are cascaded away, but not mid-run
+        if item_id in prices
+    ]
+    InventorySnapshot.objects.bulk_create(
+        snapshots, update_conflicts=True, unique_fields=['item', 'date'], update_fields=['quantity', 'value']
+    )
+    return len(snapshots)
+
+
+def parse_moment(value, param):
+    """
+    A datetime from an ISO datetime, or the end of the day for an ISO date.
+    """
+    try:
+        moment = parse_datetime(value or '')
+        day = None if moment else parse_date(value or '')
+    except ValueError:
+        moment = day = None
+    if moment is not None:
+        return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+    if day is None:
+        raise ValidationError({param: 'Enter an ISO 8601 date or datetime.'})
+    return day_start(day + timedelta(days=1)) - timedelta(microseconds=1)
+
+
+def parse_day(value, param, default):
+    if not value:
+        return default
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({param: 'Enter an ISO 8601 date.'})
+    return day
+
+
+def quantity_as_of(item, moment):
+    """
+    The item's quantity at `moment`: the closing quantity of the last snapshot
+    before that day, unless a log row still in the table is more recent. Two
+    indexed lookups however long the history, and correct for days whose logs
+    have been archived. None if the item has no history yet at `moment`.
+    """
+    snapshot = InventorySnapshot.objects.filter(
+        item=item, date__lt=timezone.localdate(moment)
+    ).order_by('-date').values_list('date', 'quantity').first()
+    logs = InventoryLog.objects.filter(item=item, timestamp__lte=moment)
+    if snapshot:
+        logs = logs.filter(timestamp__gte=day_start(snapshot[0] + timedelta(days=1)))
+    log = logs.order_by('-timestamp', '-id').values_list('new_quantity', flat=True).first()
+    if log is not None:
+        return log
+    return snapshot[1] if snapshot else None
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def stock_history(item, start, end, bucket):
+    """
+    Closing quantity and value of the item per bucket from `start` to `end`.
+    Days up to the last snapshot come from the snapshot table; only the days
+    after it are read from the log, and valued at the current price.
+    """
+    if bucket not in HISTORY_BUCKETS:
+        raise ValidationError({'bucket': f"Must be one of {', '.join(HISTORY_BUCKETS)}."})
+    if end < start:
+        raise ValidationError({'to': 'Must not be before from.'})
+    if (end - start).days >= MAX_HISTORY_DAYS:
+        raise ValidationError({'from': f'The range is limited to {MAX_HISTORY_DAYS} days.'})
+
+    closing = {
+        day: (quantity, value)
+        for day, quantity, value in item.snapshots.filter(date__range=(start, end)).values_list(
+            'date', 'quantity', 'value'
+        )
+    }
+    last_built = InventorySnapshot.objects.aggregate(last=Max('date'))['last']
+    tail_start = max(start, last_built + timedelta(days=1)) if last_built else start
+    if tail_start <= end:
+        logs = item.logs.filter(timestamp__gte=day_start(tail_start), timestamp__lt=day_start(end + timedelta(days=1)))
+        for (_, day), quantity in closing_quantities(logs).items():
+            closing[day] = (quantity, quantity * item.price)
+
+    opening = quantity_as_of(item, day_start(start) - timedelta(microseconds=1))
+    current = (opening, None if opening is None else opening * item.price)
+    buckets = {}
+    day = start
+    while day <= end:
+        current = closing.get(day, current)
+        # Later days overwrite earlier ones, leaving each bucket's close
+        buckets[bucket_start(day, bucket)] = current
+        day += timedelta(days=1)
+    return [
+        {
+            'date': day,
+            'quantity': quantity,
+            'value': None if value is None else str(Decimal(value).quantize(Decimal('0.01'))),
+        }
+        for day, (quantity, value) in buckets.items()
+    ]
@@ -1,11 +1,61 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import smtplib
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
 
 from django.contrib.auth.models import User
-from django.urls import reverse
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import include, path, resolve, reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient
 
-from .models import Category, InventoryItem, InventoryLog, Supplier
+from .authentication import ClaimsJWTAuthentication, InventoryRefreshToken
+from .cache import TTLCache, blacklisted_jtis, cache_stats, get_versions, owner_scope, response_cache_key, user_rows
+from .compiled import compile_serializer
+from .serializers import InventoryItemSerializer, InventoryLevelSerializer, InventoryLogSerializer
+from .events import OVERFLOW, InMemoryBroker, event_stream, owner_channel
+from .urls import async_read_urlpatterns, urlpatterns as inventory_urlpatterns
+from .snapshots import build_snapshots, day_start
+from .analytics import StockAnalysis
+from .metrics import Histogram, registry as metrics_registry
+from .pagination import KeysetPagination, PageSizePagination
+from .renderers import ORJSONParser, ORJSONRenderer, orjson
+from .models import (
+    Category, ClaimsUser, InventoryItem, InventoryLog, InventorySnapshot, Supplier, InventoryItemSupplier,
+    LowStockAlert, StockStatus
+)
+from .views import CategoryViewSet, InventoryItemViewSet
 
 class InventoryAPITests(TestCase):
     def setUp(self):
@@ -110,11 +160,1657 @@ class InventoryAPITests(TestCase):
         self.client.force_authenticate(user=self.user1)
         response = self.client.get(reverse('logs-item-log', args=[self.item1.id]))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data['results']), 0)
 
     def test_staff_can_view_any_item_logs(self):
         self.user1.is_staff = True
         self.user1.save()
         self.client.force_authenticate(user=self.user1)
         response = self.client.get(reverse('logs-item-log', args=[self.item2.id]))
-        self.assertEqual(response.status_code, status.HTTP_200_OK)     
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)     
+
+class InventoryItemQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='queryuser',
+            email='query@example.com',
+            password='password123'
+        )
+        self.category = Category.objects.create(name='Hardware')
+        self.supplier = Supplier.objects.create(name='Acme', owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def create_items(self, count):
+        for i in range(count):
+            item = InventoryItem.objects.create(
+                name=f'Item {i}',
+                quantity=i,
+                price=10.00,
+                category=self.category,
+                owner=self.user,
+                low_stock_threshold=100
+            )
+            InventoryItemSupplier.objects.create(item=item, supplier=self.supplier, supplier_price=5.00)
+        return item
+    
+    def assertConstantQueries(self, url, num):
+        self.create_items(2)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.create_items(8)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_list_query_count(self):
+        # validators, count, items, suppliers
+        self.assertConstantQueries(reverse('items-list'), 4)
+        
+    def test_low_stock_query_count(self):
+        # items, suppliers
+        self.assertConstantQueries(reverse('items-low-stock'), 2)
+        
+    def test_stock_level_query_count(self):
+        # validators, items
+        self.assertConstantQueries(reverse('items-stock-level'), 2)
+        
+    def test_retrieve_query_count(self):
+        item = self.create_items(1)
+        # validators, item, suppliers
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('items-detail', args=[item.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['suppliers'][0]['supplier_name'], 'Acme')
+        self.assertEqual(response.data['owner_username'], 'queryuser')
+
+
+class FailingEmailBackend(locmem.EmailBackend):
+    """
+    locmem backend refusing mail to broken@example.com.
+    """
+    def send_messages(self, messages):
+        if any('broken@example.com' in message.to for message in messages):
+            raise smtplib.SMTPRecipientsRefused({'broken@example.com': (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+class LowStockAlertTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='alertuser',
+            email='alert@example.com',
+            password='password123'
+        )
+        self.item1 = InventoryItem.objects.create(
+            name='Cable', quantity=50, price=2.00, owner=self.user, low_stock_threshold=10
+        )
+        self.item2 = InventoryItem.objects.create(
+            name='Plug', quantity=50, price=1.00, owner=self.user, low_stock_threshold=10
+        )
+        
+    def test_alert_is_queued_once_per_crossing(self):
+        self.item1.quantity = 5
+        self.item1.save()
+        self.item1.quantity = 3
+        self.item1.save()
+        self.assertEqual(LowStockAlert.objects.filter(item=self.item1).count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+        
+        self.item1.quantity = 40
+        self.item1.save()
+        self.item1.quantity = 2
+        self.item1.save()
+        self.assertEqual(LowStockAlert.objects.filter(item=self.item1).count(), 2)
+        
+    def test_command_sends_one_digest_per_owner(self):
+        for item in (self.item1, self.item2):
+            item.quantity = 1
+            item.save()
+        call_command('send_low_stock_alerts', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Cable', mail.outbox[0].body)
+        self.assertIn('Plug', mail.outbox[0].body)
+        self.assertFalse(LowStockAlert.objects.filter(sent_at__isnull=True).exists())
+        
+        call_command('send_low_stock_alerts', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        
+    @override_settings(EMAIL_BACKEND='inventory.tests.FailingEmailBackend')
+    def test_failed_send_only_holds_back_that_owner(self):
+        broken = User.objects.create_user(username='broken', email='broken@example.com', password='password123')
+        InventoryItem.objects.create(name='Fuse', quantity=1, price=1.00, owner=broken, low_stock_threshold=10)
+        self.item1.quantity = 1
+        self.item1.save()
+        with self.assertLogs('inventory.management.commands.send_low_stock_alerts', 'ERROR'):
+            call_command('send_low_stock_alerts', stdout=StringIO())
+        self.assertEqual([message.to for message in mail.outbox], [['alert@example.com']])
+        self.assertFalse(LowStockAlert.objects.filter(owner=self.user, sent_at__isnull=True).exists())
+        self.assertTrue(LowStockAlert.objects.filter(owner=broken, sent_at__isnull=True).exists())
+        
+        # The next pass retries the failed owner only
+        broken.email = 'fixed@example.com'
+        broken.save()
+        call_command('send_low_stock_alerts', stdout=StringIO())
+        self.assertEqual([message.to for message in mail.outbox], [['alert@example.com'], ['fixed@example.com']])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class AdjustQuantityConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='stressuser',
+            email='stress@example.com',
+            password='password123'
+        )
+        self.item = InventoryItem.objects.create(
+            name='Hot SKU', quantity=1000, price=1.00, owner=self.user, low_stock_threshold=0
+        )
+        
+    def adjust(self, quantity_change, times):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        try:
+            for _ in range(times):
+                response = client.post(
+                    reverse('items-adjust-quantity', args=[self.item.id]),
+                    {'quantity_change': quantity_change},
+                    format='json'
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        finally:
+            connection.close()
+        
+    def test_concurrent_adjustments_are_not_lost(self):
+        threads = [
+            threading.Thread(target=self.adjust, args=(1 if i % 2 else -2, 10))
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 1000 + 4 * 10 - 4 * 20)
+        logs = list(InventoryLog.objects.filter(item=self.item).order_by('id'))
+        self.assertEqual(len(logs), 80)
+        for previous, current in zip(logs, logs[1:]):
+            self.assertEqual(previous.new_quantity, current.previous_quantity)
+
+
+class BulkAdjustTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='bulkuser',
+            email='bulk@example.com',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='password123'
+        )
+        self.item1 = InventoryItem.objects.create(
+            name='Bolt', sku='BOLT-1', quantity=100, price=0.10, owner=self.user, low_stock_threshold=5
+        )
+        self.item2 = InventoryItem.objects.create(
+            name='Nut', sku='NUT-1', quantity=20, price=0.05, owner=self.user, low_stock_threshold=5
+        )
+        self.foreign = InventoryItem.objects.create(
+            name='Washer', sku='WASH-1', quantity=20, price=0.01, owner=self.other
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_bulk_adjust_applies_rows_and_logs(self):
+        data = [
+            {'id': self.item1.id, 'quantity_change': -30},
+            {'sku': 'NUT-1', 'quantity_change': -18, 'notes': 'Cycle count'},
+            {'id': self.item1.id, 'quantity_change': 5},
+            {'sku': 'WASH-1', 'quantity_change': 1},
+        ]
+        response = self.client.post(reverse('items-bulk-adjust'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['ok', 'ok', 'ok', 'error'])
+        self.assertEqual(results[2]['previous_quantity'], 70)
+        
+        self.item1.refresh_from_db()
+        self.item2.refresh_from_db()
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.item1.quantity, 75)
+        self.assertEqual(self.item2.quantity, 2)
+        self.assertEqual(self.foreign.quantity, 20)
+        self.assertEqual(InventoryLog.objects.filter(item=self.item1).count(), 2)
+        self.assertEqual(InventoryLog.objects.get(id=results[1]['log']).notes, 'Cycle count')
+        self.assertTrue(LowStockAlert.objects.filter(item=self.item2).exists())
+        
+    def test_bulk_adjust_rejects_invalid_rows(self):
+        data = [{'quantity_change': 1}, {'id': self.item1.id, 'quantity_change': 0}]
+        response = self.client.post(reverse('items-bulk-adjust'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+    @override_settings(INVENTORY_MAX_BULK_ADJUSTMENTS=3)
+    def test_bulk_adjust_limits_request_size(self):
+        data = [{'id': self.item1.id, 'quantity_change': 1} for _ in range(4)]
+        response = self.client.post(reverse('items-bulk-adjust'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.item1.refresh_from_db()
+        self.assertEqual(self.item1.quantity, 100)
+        response = self.client.post(reverse('items-bulk-adjust'), data[:3], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_bulk_adjust_query_count_is_constant(self):
+        data = [{'id': self.item1.id, 'quantity_change': 1} for _ in range(100)]
+        # savepoint, locked fetch, bulk update, bulk insert, alert lookup, release
+        with self.assertNumQueries(6):
+            response = self.client.post(reverse('items-bulk-adjust'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.item1.refresh_from_db()
+        self.assertEqual(self.item1.quantity, 200)
+
+
+class ImportItemsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='importuser',
+            email='import@example.com',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='otherimporter',
+            email='otherimport@example.com',
+            password='password123'
+        )
+        self.existing = InventoryItem.objects.create(
+            name='Old Drill', sku='DRILL-1', quantity=5, price=80.00, owner=self.user
+        )
+        InventoryItem.objects.create(name='Saw', sku='SAW-1', quantity=5, price=30.00, owner=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_csv_import_upserts_by_sku(self):
+        upload = SimpleUploadedFile('items.csv', (
+            "sku,name,quantity,price,category,location\n"
+            "DRILL-1,Drill,12,85.50,Tools,A1\n"
+            "HAMMER-1,Hammer,40,15.00,Tools,A2\n"
+            "SAW-1,Saw,1,30.00,Tools,A3\n"
+            "BAD-1,Bad,many,1.00,,\n"
+        ).encode())
+        response = self.client.post(reverse('items-bulk-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rows'], 4)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['error_count'], 2)
+        
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, 'Drill')
+        self.assertEqual(self.existing.quantity, 12)
+        self.assertEqual(self.existing.category.name, 'Tools')
+        hammer = InventoryItem.objects.get(sku='HAMMER-1')
+        self.assertEqual(hammer.owner, self.user)
+        self.assertEqual(InventoryLog.objects.get(item=self.existing).action, 'UPDATE')
+        self.assertEqual(InventoryLog.objects.get(item=hammer).action, 'ADD')
+        self.assertEqual(InventoryItem.objects.get(sku='SAW-1').quantity, 5)
+        
+    def test_command_imports_json_lines(self):
+        upload = SimpleUploadedFile('items.jsonl', (
+            '{"sku": "TAPE-1", "name": "Tape", "quantity": 3, "price": "2.50"}\n'
+            '{"sku": "TAPE-1", "name": "Tape", "quantity": 7, "price": "2.50"}\n'
+            'not json\n'
+        ).encode())
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as f:
+            f.write(upload.read())
+            f.flush()
+            out = StringIO()
+            call_command('import_items', f.name, owner='importuser', stdout=out)
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(InventoryItem.objects.get(sku='TAPE-1').quantity, 7)
+        
+    def test_invalid_rows_are_reported_with_line_numbers(self):
+        rows = [
+            {'sku': 'OK-1', 'name': 'Fine', 'quantity': 1, 'price': 9.99},
+            {'sku': 'NAN-1', 'name': 'Nan', 'quantity': 1, 'price': 'NaN'},
+            {'sku': 'SNAN-1', 'name': 'Snan', 'quantity': 1, 'price': 'sNaN'},
+            {'sku': 'INF-1', 'name': 'Inf', 'quantity': 1, 'price': 'Infinity'},
+            {'sku': 'NEG-1', 'name': 'Negative', 'quantity': 1, 'price': '-1.00'},
+            {'sku': 'THR-1', 'name': 'Threshold', 'quantity': 1, 'price': '1.00', 'low_stock_threshold': -1},
+            {'sku': 'S' * 51, 'name': 'Long SKU', 'quantity': 1, 'price': '1.00'},
+            {'sku': 'NAME-1', 'name': 'N' * 256, 'quantity': 1, 'price': '1.00'},
+            {'sku': 'BIG-1', 'name': 'Big', 'quantity': 1, 'price': '123456789.00'},
+            {'sku': 'CENT-1', 'name': 'Cents', 'quantity': 1, 'price': '1.005'},
+            {'sku': 'CAT-1', 'name': 'Category', 'quantity': 1, 'price': '1.00', 'category': 'C' * 256},
+        ]
+        upload = SimpleUploadedFile('items.jsonl', ''.join(json.dumps(row) + '\n' for row in rows).encode())
+        response = self.client.post(reverse('items-bulk-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['line'] for error in response.data['errors']], list(range(2, len(rows) + 1)))
+        self.assertEqual(InventoryItem.objects.get(sku='OK-1').price, Decimal('9.99'))
+        self.assertFalse(Category.objects.exists())
+        
+    def test_new_categories_invalidate_cached_category_list(self):
+        Category.objects.create(name='Existing')
+        self.assertEqual(self.client.get(reverse('category-list')).data['count'], 1)
+        upload = SimpleUploadedFile('items.csv', b"sku,name,quantity,price,category\nNEW-1,New,1,1.00,Fresh\n")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('items-bulk-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(self.client.get(reverse('category-list')).data['count'], 2)
+
+    def test_sku_created_concurrently_by_another_user_is_not_overwritten(self):
+        manager = InventoryItem.objects
+        bulk_create = manager.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Another user's import commits the same SKU after the ownership check
+            InventoryItem.objects.create(name='Theirs', sku='RACE-1', quantity=2, price=5.00, owner=self.other)
+            return bulk_create(objs, **kwargs)
+
+        upload = SimpleUploadedFile('items.csv', b"sku,name,quantity,price\nRACE-1,Mine,9,1.00\nNEW-1,New,1,1.00\n")
+        with patch.object(manager, 'bulk_create', racing_bulk_create):
+            response = self.client.post(reverse('items-bulk-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [{'line': 2, 'error': "SKU 'RACE-1' belongs to another user"}])
+        race = InventoryItem.objects.get(sku='RACE-1')
+        self.assertEqual((race.owner, race.name, race.quantity), (self.other, 'Theirs', 2))
+        self.assertFalse(InventoryLog.objects.filter(item=race).exists())
+        self.assertEqual(InventoryItem.objects.get(sku='NEW-1').owner, self.user)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='exportuser',
+            email='export@example.com',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='otherexporter',
+            email='otherexport@example.com',
+            password='password123'
+        )
+        self.category = Category.objects.create(name='Garden')
+        self.item1 = InventoryItem.objects.create(
+            name='Rake', sku='RAKE-1', quantity=4, price=12.50, category=self.category, owner=self.user
+        )
+        self.item2 = InventoryItem.objects.create(
+            name='Spade', sku='SPADE-1', quantity=9, price=20.00, owner=self.user
+        )
+        InventoryItem.objects.create(name='Hose', sku='HOSE-1', quantity=3, price=8.00, owner=self.other)
+        InventoryLog.objects.create(
+            item=self.item1, user=self.user, action='ADD', quantity_change=4, previous_quantity=0, new_quantity=4
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_item_csv_export_honours_filters_and_ownership(self):
+        response = self.client.get(reverse('items-export'), {'max_price': 15})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'sku', 'name'])
+        self.assertEqual([row[1] for row in rows[1:]], ['RAKE-1'])
+        self.assertEqual(rows[1][4], 'Garden')
+        self.assertEqual(rows[1][6], '12.50')
+        
+    def test_log_ndjson_export(self):
+        response = self.client.get(reverse('logs-export'), {'type': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row['item_sku'], 'RAKE-1')
+        self.assertEqual(row['username'], 'exportuser')
+        
+    def test_export_rejects_unknown_type(self):
+        response = self.client.get(reverse('items-export'), {'type': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class InventoryLogPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='feeduser',
+            email='feed@example.com',
+            password='password123'
+        )
+        self.item = InventoryItem.objects.create(name='Feed Item', quantity=100, price=1.00, owner=self.user)
+        self.other_item = InventoryItem.objects.create(name='Other Item', quantity=100, price=1.00, owner=self.user)
+        # Several logs share a timestamp, as bulk adjustments produce.
+        timestamp = timezone.now()
+        InventoryLog.objects.bulk_create([
+            InventoryLog(
+                item=self.item if i % 2 else self.other_item, user=self.user, action='ADD',
+                quantity_change=1, previous_quantity=i, new_quantity=i + 1,
+                timestamp=timestamp - timedelta(seconds=i // 5)
+            )
+            for i in range(25)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def walk(self, url, params=None):
+        seen = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(log['id'] for log in response.data['results'])
+            if not response.data['next']:
+                return seen, response
+            response = self.client.get(response.data['next'])
+            
+    def test_walks_full_feed_without_duplicates(self):
+        seen, _ = self.walk(reverse('logs-list'))
+        expected = list(InventoryLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        
+    def test_ascending_feed_and_previous_link(self):
+        seen, last = self.walk(reverse('logs-list'), {'ordering': 'timestamp'})
+        expected = list(InventoryLog.objects.order_by('timestamp', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        response = self.client.get(last.data['previous'])
+        self.assertEqual([log['id'] for log in response.data['results']], expected[10:20])
+        
+    def test_item_log_is_paginated(self):
+        seen, _ = self.walk(reverse('logs-item-log', args=[self.item.id]))
+        self.assertEqual(len(seen), 12)
+        
+    def test_page_query_count_is_constant(self):
+        response = self.client.get(reverse('logs-list'))
+        with self.assertNumQueries(1):
+            self.client.get(response.data['next'])
+            
+    def test_client_page_size(self):
+        response = self.client.get(reverse('logs-list'), {'page_size': 7})
+        self.assertEqual(len(response.data['results']), 7)
+        seen, _ = self.walk(reverse('logs-list'), {'page_size': 7})
+        self.assertEqual(len(seen), 25)
+        with patch.object(KeysetPagination, 'max_page_size', 20):
+            response = self.client.get(reverse('logs-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 20)
+        
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('logs-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN checks need PostgreSQL")
+class QueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN on every query an endpoint issues with sequential scans
+    disabled. If the planner still reads a whole table, either as a Seq Scan or
+    as an index scan with no Index Cond feeding a Sort, no index can serve
+    that query shape.
+    """
+    checked_tables = ('inventory_inventoryitem', 'inventory_inventorylog')
+    scan_node = re.compile(r'(Seq Scan|Index Scan|Index Only Scan)(?: Backward)?(?: using \S+)? on (\S+)')
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='planuser',
+            email='plan@example.com',
+            password='password123'
+        )
+        self.item = InventoryItem.objects.create(
+            name='Planned', sku='PLAN-1', quantity=1, price=5.00, location='B2', owner=self.user
+        )
+        InventoryLog.objects.create(
+            item=self.item, user=self.user, action='ADD', quantity_change=1, previous_quantity=0, new_quantity=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def assertIndexedPlans(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            for query in ctx.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN ' + query['sql'])
+                plan = [row[0] for row in cursor.fetchall()]
+                self.assertEqual(self.full_scans(plan), [], f"{url}: {query['sql']}\n" + '\n'.join(plan))
+                
+    def full_scans(self, plan):
+        sorted_plan = any('Sort' in line for line in plan)
+        scans = []
+        for i, line in enumerate(plan):
+            match = self.scan_node.search(line)
+            if not match or match.group(2) not in self.checked_tables:
+                continue
+            details = []
+            for detail in plan[i + 1:]:
+                if '->' in detail:
+                    break
+                details.append(detail)
+            has_cond = any('Index Cond' in detail for detail in details)
+            if match.group(1) == 'Seq Scan' or (not has_cond and sorted_plan):
+                scans.append(line.strip())
+        return scans
+                    
+    def test_item_list_plans(self):
+        self.assertIndexedPlans(reverse('items-list'))
+        self.assertIndexedPlans(reverse('items-list'), {'location': 'B2'})
+        self.assertIndexedPlans(reverse('items-list'), {'min_price': 1, 'max_price': 10})
+        
+    def test_staff_search_plan(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIndexedPlans(reverse('items-list'), {'search': 'planned widget'})
+        
+    def test_low_stock_plan(self):
+        self.assertIndexedPlans(reverse('items-low-stock'))
+        
+    def test_log_feed_plans(self):
+        self.assertIndexedPlans(reverse('logs-list'))
+        self.assertIndexedPlans(reverse('logs-item-log', args=[self.item.id]))
+
+
+class ItemSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='searchuser',
+            email='search@example.com',
+            password='password123'
+        )
+        self.category = Category.objects.create(name='Plumbing')
+        self.wrench = InventoryItem.objects.create(
+            name='Pipe Wrench', sku='WR-100', description='Heavy duty', quantity=3, price=25.00, owner=self.user
+        )
+        self.tape = InventoryItem.objects.create(
+            name='Sealing Tape', sku='TP-200', description='For wrench fittings', quantity=3, price=2.00,
+            category=self.category, owner=self.user
+        )
+        self.hammer = InventoryItem.objects.create(
+            name='Hammer', sku='HM-300', description='Claw hammer', quantity=3, price=9.00, owner=self.user
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def search(self, term):
+        response = self.client.get(reverse('items-list'), {'search': term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['results']]
+        
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('wrench'), ['Pipe Wrench', 'Sealing Tape'])
+        
+    def test_prefix_and_multiple_terms(self):
+        self.assertEqual(self.search('ham'), ['Hammer'])
+        self.assertEqual(self.search('claw ham'), ['Hammer'])
+        
+    def test_category_name_matches(self):
+        self.assertEqual(self.search('plumb'), ['Sealing Tape'])
+        
+    def test_sku_prefix_matches(self):
+        # category lookup and validators, category lookup, count, page, suppliers
+        with self.assertNumQueries(6):
+            names = self.search('WR-1')
+        self.assertEqual(names, ['Pipe Wrench'])
+        
+    def test_sku_prefix_keeps_name_matches(self):
+        InventoryItem.objects.create(name='Chair', sku='CH-1', quantity=3, price=40.00, owner=self.user)
+        InventoryItem.objects.create(name='Chain', sku='LNK-1', quantity=3, price=5.00, owner=self.user)
+        self.assertEqual(sorted(self.search('CH')), ['Chain', 'Chair'])
+        self.assertEqual(sorted(self.search('C')), ['Chain', 'Chair', 'Hammer'])
+        
+    def test_search_sees_updates(self):
+        self.hammer.name = 'Mallet'
+        self.hammer.save()
+        self.assertEqual(self.search('mallet'), ['Mallet'])
+        self.assertEqual(self.search('hammer'), ['Mallet'])
+        self.hammer.delete()
+        self.assertEqual(self.search('mallet'), [])
+
+
+class InventorySummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='summaryuser',
+            email='summary@example.com',
+            password='password123'
+        )
+        self.category = Category.objects.create(name='Paint')
+        self.item1 = InventoryItem.objects.create(
+            name='Primer', quantity=10, price=5.50, category=self.category, owner=self.user, low_stock_threshold=2
+        )
+        InventoryItem.objects.create(
+            name='Gloss', quantity=1, price=8.00, category=self.category, owner=self.user, low_stock_threshold=2
+        )
+        InventoryItem.objects.create(name='Brush', quantity=0, price=3.00, owner=self.user)
+        other = User.objects.create_user(username='summaryother', password='password123')
+        InventoryItem.objects.create(name='Roller', quantity=100, price=4.00, owner=other)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_summary_totals(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('items-summary'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['item_count'], 3)
+        self.assertEqual(response.data['total_quantity'], 11)
+        self.assertEqual(response.data['total_value'], '63.00')
+        self.assertEqual(response.data['low_stock_count'], 1)
+        self.assertEqual(response.data['out_of_stock_count'], 1)
+        paint = next(row for row in response.data['categories'] if row['category_name'] == 'Paint')
+        self.assertEqual(paint['item_count'], 2)
+        self.assertEqual(paint['total_value'], '63.00')
+        
+    def test_summary_is_cached_until_items_change(self):
+        self.client.get(reverse('items-summary'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('items-summary'))
+            
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item1.quantity = 20
+            self.item1.save()
+        response = self.client.get(reverse('items-summary'))
+        self.assertEqual(response.data['total_quantity'], 21)
+        
+    def test_category_rename_invalidates_summary(self):
+        self.client.get(reverse('items-summary'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Coatings'
+            self.category.save()
+        response = self.client.get(reverse('items-summary'))
+        self.assertIn('Coatings', [row['category_name'] for row in response.data['categories']])
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_stats.reset()
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='cacheother',
+            email='cacheother@example.com',
+            password='password123'
+        )
+        self.item = InventoryItem.objects.create(name='Cached', quantity=5, price=1.00, owner=self.user)
+        Category.objects.create(name='Cached Category')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_category_list_is_cached_and_invalidated(self):
+        self.client.get(reverse('category-list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('category-list'))
+        self.assertEqual(response.data['count'], 1)
+        
+        Category.objects.create(name='Another Category')
+        response = self.client.get(reverse('category-list'))
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(cache_stats.snapshot()['hits'], 1)
+        self.assertEqual(cache_stats.snapshot()['misses'], 2)
+        
+    def test_cache_is_per_user_and_query_string(self):
+        self.client.get(reverse('items-list'))
+        response = self.client.get(reverse('items-list'), {'search': 'nothing-matches'})
+        self.assertEqual(response.data['count'], 0)
+        
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get(reverse('items-list'))
+        self.assertEqual(response.data['count'], 0)
+        
+    def test_item_writes_invalidate_detail(self):
+        url = reverse('items-detail', args=[self.item.id])
+        self.client.get(url)
+        self.client.post(reverse('items-adjust-quantity', args=[self.item.id]), {'quantity_change': 3}, format='json')
+        response = self.client.get(url)
+        self.assertEqual(response.data['quantity'], 8)
+        
+    def test_waits_for_lock_holder_then_falls_back(self):
+        with patch.object(CategoryViewSet, 'cache_wait_attempts', 1), \
+                patch.object(CategoryViewSet, 'cache_wait_interval', 0):
+            with patch('inventory.cache.cache.add', return_value=False):
+                response = self.client.get(reverse('category-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cache_stats.snapshot()['lock_waits'], 1)
+        
+    def test_file_based_cache_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+            with override_settings(CACHES=backend):
+                self.client.get(reverse('category-list'))
+                with self.assertNumQueries(0):
+                    response = self.client.get(reverse('category-list'))
+                self.assertEqual(response.data['count'], 1)
+                
+    def test_cache_stats_requires_staff(self):
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='etaguser',
+            email='etag@example.com',
+            password='password123'
+        )
+        self.item = InventoryItem.objects.create(name='Tagged', quantity=5, price=1.00, owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_list_not_modified(self):
+        url = reverse('items-stock-level')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_etag_changes_on_write_and_delete(self):
+        url = reverse('items-list')
+        etag = self.client.get(url)['ETag']
+        self.item.quantity = 6
+        self.item.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        etag = response['ETag']
+        InventoryItem.objects.create(name='Other', quantity=1, price=1.00, owner=self.user).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_detail_and_category_not_modified(self):
+        for url in [reverse('items-detail', args=[self.item.id]), reverse('category-list')]:
+            etag = self.client.get(url)['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            
+    def test_missing_item_is_still_404(self):
+        response = self.client.get(reverse('items-detail', args=[self.item.id + 100]), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+    def test_if_match_prevents_lost_update(self):
+        url = reverse('items-detail', args=[self.item.id])
+        etag = self.client.get(url)['ETag']
+        
+        response = self.client.patch(url, {'quantity': 7}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        
+        response = self.client.patch(url, {'quantity': 9}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 7)
+
+
+@patch('inventory.sync.SETTLE_TIME', timedelta(0))
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='syncuser',
+            email='sync@example.com',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='syncother',
+            email='syncother@example.com',
+            password='password123'
+        )
+        self.items = [
+            InventoryItem.objects.create(name=f'Synced {i}', sku=f'SYN-{i}', quantity=5, price=1.00, owner=self.user)
+            for i in range(3)
+        ]
+        InventoryItem.objects.create(name='Not mine', quantity=5, price=1.00, owner=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def sync(self, since=None):
+        params = {'since': since} if since else {}
+        response = self.client.get(reverse('items-changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+        
+    def test_initial_then_incremental_sync(self):
+        data = self.sync()
+        self.assertEqual([item['sku'] for item in data['changed']], ['SYN-0', 'SYN-1', 'SYN-2'])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+        
+        quiet = self.sync(data['next'])
+        self.assertEqual((quiet['changed'], quiet['deleted']), ([], []))
+        
+        deleted_id = self.items[2].id
+        self.items[1].quantity = 2
+        self.items[1].save()
+        self.items[2].delete()
+        self.other.inventory_items.all().delete()
+        data = self.sync(quiet['next'])
+        self.assertEqual([item['sku'] for item in data['changed']], ['SYN-1'])
+        self.assertEqual([(row['id'], row['sku']) for row in data['deleted']], [(deleted_id, 'SYN-2')])
+        
+    def test_pages_through_keyset(self):
+        with patch('inventory.views.SYNC_PAGE_SIZE', 2):
+            first = self.sync()
+            self.assertTrue(first['has_more'])
+            second = self.sync(first['next'])
+        self.assertFalse(second['has_more'])
+        skus = [item['sku'] for item in first['changed'] + second['changed']]
+        self.assertEqual(skus, ['SYN-0', 'SYN-1', 'SYN-2'])
+        
+    def test_invalid_token(self):
+        response = self.client.get(reverse('items-changes'), {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StockEventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='streamuser',
+            email='stream@example.com',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='streamother',
+            email='streamother@example.com',
+            password='password123'
+        )
+        self.item = InventoryItem.objects.create(name='Streamed', quantity=20, price=1.00, owner=self.user)
+        self.other_item = InventoryItem.objects.create(name='Elsewhere', quantity=20, price=1.00, owner=self.other)
+        
+    def adjust(self, item, quantity_change):
+        client = APIClient()
+        client.force_authenticate(user=item.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(reverse('items-adjust-quantity', args=[item.id]), {'quantity_change': quantity_change}, format='json')
+            
+    async def test_stream_pushes_own_events(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        
+        await sync_to_async(self.adjust)(self.other_item, -15)
+        await sync_to_async(self.adjust)(self.item, -15)
+        received = [(await asyncio.wait_for(anext(chunks), 2)).decode() for _ in range(2)]
+        await chunks.aclose()
+        
+        events = [json.loads(chunk.split('data: ')[1]) for chunk in received]
+        self.assertEqual({event['type'] for event in events}, {'low_stock', 'inventory_log'})
+        self.assertEqual({event['item'] for event in events}, {self.item.id})
+        
+    async def test_closing_unstarted_stream_leaves_no_subscription(self):
+        broker = InMemoryBroker()
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        with patch('inventory.views.get_broker', return_value=broker):
+            response = await client.get(reverse('events'))
+        response.close()
+        self.assertEqual(broker._subscriptions, {})
+        
+        stream = event_stream(broker, [owner_channel(self.user.id)])
+        await anext(stream)
+        self.assertIn(owner_channel(self.user.id), broker._subscriptions)
+        await stream.aclose()
+        self.assertEqual(broker._subscriptions, {})
+        
+    def test_requires_authentication(self):
+        response = self.client.get(reverse('events'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    async def test_slow_subscriber_overflows(self):
+        broker = InMemoryBroker()
+        broker.queue_size = 2
+        subscription = broker.subscribe(['owner:1'])
+        for quantity in range(3):
+            broker.publish(['owner:1'], {'type': 'inventory_log', 'new_quantity': quantity})
+        await asyncio.sleep(0)
+        self.assertIs(await subscription.get(timeout=1), OVERFLOW)
+        self.assertTrue(subscription.queue.empty())
+
+
+class AsyncReadsURLConf:
+    urlpatterns = [path('api/inventory/', include(async_read_urlpatterns() + inventory_urlpatterns))]
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='asyncuser',
+            email='async@example.com',
+            password='password123'
+        )
+        category = Category.objects.create(name='Async Category')
+        supplier = Supplier.objects.create(name='Async Supplier', owner=self.user)
+        self.item = InventoryItem.objects.create(
+            name='Async Item', sku='ASY-1', quantity=2, price=3.50, category=category, owner=self.user
+        )
+        InventoryItemSupplier.objects.create(item=self.item, supplier=supplier, supplier_price=2.00)
+        self.item.quantity = 1
+        self.item.save()
+        InventoryItem.objects.create(name='Other Async Item', quantity=50, price=1.00, owner=self.user)
+        token = RefreshToken.for_user(self.user).access_token
+        self.client = APIClient(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # The async routes sit on the outer prefix; reverse() would pick the
+        # router's duplicate nested one
+        self.urls = [
+            '/api/inventory/items/',
+            '/api/inventory/items/?page=1',
+            f'/api/inventory/items/{self.item.id}/',
+            '/api/inventory/items/level/',
+            f'/api/inventory/items/{self.item.id}/level/',
+            '/api/inventory/items/low-stock/',
+            '/api/inventory/logs/',
+            '/api/inventory/logs/?ordering=timestamp',
+        ]
+        
+    def test_async_views_match_viewsets(self):
+        with override_settings(ROOT_URLCONF=AsyncReadsURLConf):
+            async_responses = [self.client.get(url) for url in self.urls]
+        # Build the viewset responses afresh rather than from the cache the
+        # async views just filled
+        with patch.object(InventoryItemViewSet, 'cache_actions', ()):
+            sync_responses = [self.client.get(url) for url in self.urls]
+        for url, sync_response, async_response in zip(self.urls, sync_responses, async_responses):
+            with self.subTest(url=url):
+                view = resolve(url.split('?')[0], urlconf=AsyncReadsURLConf).func
+                self.assertTrue(asyncio.iscoroutinefunction(view))
+                self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+                self.assertEqual(async_response.json(), json.loads(sync_response.content))
+                self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'))
+                
+    def test_shares_validators_with_viewsets(self):
+        url = '/api/inventory/items/level/'
+        etag = self.client.get(url)['ETag']
+        with override_settings(ROOT_URLCONF=AsyncReadsURLConf):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_other_requests_fall_back_to_viewsets(self):
+        with override_settings(ROOT_URLCONF=AsyncReadsURLConf):
+            response = self.client.get('/api/inventory/items/', {'search': 'ASY-1'})
+            self.assertEqual([item['sku'] for item in response.data['results']], ['ASY-1'])
+            response = self.client.post(
+                '/api/inventory/items/', {'name': 'Posted', 'quantity': 1, 'price': '1.00'}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            
+    def test_non_json_requests_fall_back_to_viewsets(self):
+        with override_settings(ROOT_URLCONF=AsyncReadsURLConf):
+            response = self.client.get('/api/inventory/items/level/', HTTP_ACCEPT='text/html')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response['Content-Type'].startswith('text/html'))
+            response = self.client.get('/api/inventory/items/level/', HTTP_ACCEPT='application/xml')
+            self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+            response = self.client.get('/api/inventory/items/level/', HTTP_ACCEPT='application/json')
+            self.assertEqual(response['Content-Type'], 'application/json')
+            
+    def test_authentication_and_ownership(self):
+        intruder = User.objects.create_user(username='asyncintruder', password='password123')
+        with override_settings(ROOT_URLCONF=AsyncReadsURLConf):
+            response = APIClient().get('/api/inventory/items/')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+            response = APIClient(HTTP_AUTHORIZATION='Bearer not-a-token').get('/api/inventory/items/')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response.data['code'], 'token_not_valid')
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+            client = APIClient()
+            client.force_login(intruder)
+            response = client.get(f'/api/inventory/items/{self.item.id}/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            # A non-bearer Authorization header leaves the session in charge
+            response = client.get('/api/inventory/items/level/', HTTP_AUTHORIZATION='Basic Zm9vOmJhcg==')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), [])
+
+
+class CompiledSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='compileduser', password='password123')
+        category = Category.objects.create(name='Compiled Category')
+        supplier = Supplier.objects.create(name='Compiled Supplier', owner=self.user)
+        full = InventoryItem.objects.create(
+            name='Full', sku='CMP-1', description='All fields', quantity=30, price='12.50',
+            category=category, owner=self.user, location='A1', low_stock_threshold=40
+        )
+        for price in ['1.10', '2.20']:
+            InventoryItemSupplier.objects.create(
+                item=full, supplier=Supplier.objects.create(name=f'Supplier {price}', owner=self.user),
+                supplier_price=price, supplier_sku=f'S-{price}'
+            )
+        InventoryItemSupplier.objects.create(item=InventoryItem.objects.create(
+            name='Bare', quantity=0, price=0, owner=None
+        ), supplier=supplier, supplier_price=3)
+        for quantity in [5, 25, 75]:
+            InventoryItem.objects.create(name=f'Stock {quantity}', quantity=quantity, price='9.99', owner=self.user)
+            
+    def test_output_is_byte_identical(self):
+        renderer = JSONRenderer()
+        for serializer_class in [InventoryItemSerializer, InventoryLevelSerializer]:
+            with self.subTest(serializer=serializer_class.__name__):
+                queryset = serializer_class.setup_eager_loading(InventoryItem.objects.all())
+                expected = renderer.render(serializer_class(queryset, many=True).data)
+                actual = renderer.render(compile_serializer(serializer_class).data(queryset))
+                self.assertEqual(actual, expected)
+                
+    def test_list_skips_model_instances(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with patch.object(InventoryItem, '__init__', side_effect=AssertionError('instance built')):
+            response = client.get(reverse('items-list'))
+        self.assertEqual(response.data['count'], 4)
+
+
+class StockStatusTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='statususer', password='password123', is_staff=True)
+        self.items = {
+            name: InventoryItem.objects.create(
+                name=name, quantity=quantity, price=1, owner=self.user, low_stock_threshold=threshold
+            )
+            for name, quantity, threshold in [
+                ('Empty', 0, 10), ('Scarce', 5, 5), ('Half', 12, 10), ('Plenty', 21, 10), ('Bulk', 50, 100),
+            ]
+        }
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def get_names(self, params):
+        response = self.client.get(reverse('items-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['results']]
+        
+    def test_status_respects_item_threshold(self):
+        statuses = dict(InventoryItem.objects.values_list('name', 'stock_status'))
+        self.assertEqual(statuses, {
+            'Empty': StockStatus.OUT, 'Scarce': StockStatus.LOW, 'Half': StockStatus.MEDIUM,
+            'Plenty': StockStatus.IN, 'Bulk': StockStatus.LOW,
+        })
+        
+    def test_status_follows_saves(self):
+        item = self.items['Plenty']
+        item.quantity = 3
+        item.save()
+        self.assertEqual(item.stock_status, StockStatus.LOW)
+        self.assertEqual(item.get_stock_status_display(), 'Low Stock')
+        
+    def test_filter_and_ordering(self):
+        self.assertEqual(self.get_names({'stock_status': 'low'}), ['Bulk', 'Scarce'])
+        self.assertEqual(self.get_names({'ordering': 'stock_status,name'}), ['Empty', 'Bulk', 'Scarce', 'Half', 'Plenty'])
+        response = self.client.get(reverse('items-list'), {'stock_status': 'critical'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+    def test_stock_level_and_admin_share_status(self):
+        response = self.client.get(reverse('items-stock-level'))
+        statuses = {row['name']: row['stock_status'] for row in response.data}
+        self.assertEqual(statuses['Bulk'], 'Low Stock')
+        self.assertEqual(statuses['Half'], 'Medium Stock')
+        
+        self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        response = self.client.get('/admin/inventory/inventoryitem/', {'stock_status__exact': StockStatus.OUT})
+        self.assertContains(response, 'Out of Stock')
+        self.assertEqual(response.context['cl'].result_count, 1)
+        
+    def test_low_stock_listing_matches_status(self):
+        # Scarce sits exactly at its threshold
+        response = self.client.get(reverse('items-low-stock'))
+        self.assertEqual([row['name'] for row in response.data], ['Bulk', 'Empty', 'Scarce'])
+        self.assertTrue(all(row['is_low_stock'] for row in response.data))
+
+
+@skipUnless(orjson, "orjson is not installed")
+class ORJSONRendererTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='jsonuser', password='password123')
+        category = Category.objects.create(name='Caf\u00e9 supplies')
+        item = InventoryItem.objects.create(
+            name='Espresso \u2028 beans', quantity=3, price='12.50', category=category, owner=self.user
+        )
+        InventoryItemSupplier.objects.create(
+            item=item, supplier=Supplier.objects.create(name='Roaster', owner=self.user), supplier_price='7.25'
+        )
+        InventoryLog.objects.create(
+            item=item, user=self.user, action='ADD', quantity_change=3, previous_quantity=0, new_quantity=3
+        )
+        
+    def test_output_matches_json_renderer(self):
+        payloads = [
+            InventoryItemSerializer(InventoryItem.objects.all(), many=True).data,
+            InventoryLevelSerializer(InventoryItem.objects.all(), many=True).data,
+            InventoryLogSerializer(InventoryLog.objects.all(), many=True).data,
+            {
+                'decimal': Decimal('1.10'), 'aware': timezone.now(), 'naive': datetime(2024, 5, 1, 12, 30, 0, 123456),
+                'date': date(2024, 5, 1), 'time': time(8, 15), 'uuid': uuid.uuid4(), 'lazy': gettext_lazy('Items'),
+                'error': [ErrorDetail('Invalid', code='invalid')], 'keys': {1: 'one'}, 'separators': '\u2028\u2029',
+            },
+        ]
+        for data in payloads:
+            with self.subTest(data=data):
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+                
+    def test_indent_and_oversized_integers_fall_back(self):
+        data = {'big': 2 ** 70, 'items': [1, 2]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+        
+    def test_parser_matches_json_parser(self):
+        body = '{"name": "Caf\u00e9", "quantity": 3, "price": 1.5, "tags": [null, true]}'.encode()
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        for invalid in [b'{"quantity": }', b'{"quantity": NaN}']:
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(io.BytesIO(invalid))
+
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sparseuser', password='password123')
+        supplier = Supplier.objects.create(name='Sparse Supplier', owner=self.user)
+        for i in range(12):
+            item = InventoryItem.objects.create(
+                name=f'Sparse {i:02}', sku=f'SP-{i}', description='Long text', quantity=i, price=1, owner=self.user
+            )
+            InventoryItemSupplier.objects.create(item=item, supplier=supplier, supplier_price=1)
+        self.item = item
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_client_page_size_is_capped(self):
+        response = self.client.get(reverse('items-list'), {'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIn('page_size=5', response.data['next'])
+        with patch.object(PageSizePagination, 'max_page_size', 8):
+            response = self.client.get(reverse('items-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 8)
+        
+    def test_fields_narrow_output_and_sql(self):
+        # validators, count, items; no supplier query
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('items-list'), {'fields': 'id,sku,quantity', 'page_size': 20})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn('description', queries[-1]['sql'])
+        first = InventoryItem.objects.get(sku='SP-0')
+        self.assertEqual(response.data['results'][0], {'id': first.id, 'sku': 'SP-0', 'quantity': 0})
+        
+    def test_expand_suppliers(self):
+        response = self.client.get(reverse('items-list'), {'fields': 'sku', 'expand': 'suppliers'})
+        self.assertEqual(list(response.data['results'][0]), ['sku', 'suppliers'])
+        self.assertEqual(response.data['results'][0]['suppliers'][0]['supplier_name'], 'Sparse Supplier')
+        
+    def test_retrieve_fields(self):
+        # validators, item
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('items-detail', args=[self.item.id]), {'fields': 'name,category_name,is_low_stock'}
+            )
+        # category_name is left out for an item without a category, as without ?fields=
+        self.assertEqual(response.data, {'name': 'Sparse 11', 'is_low_stock': False})
+        
+    def test_unknown_fields_are_rejected(self):
+        for params in [{'fields': 'sku,cost'}, {'fields': 'sku', 'expand': 'owner'}]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse('items-list'), params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+class ArchiveLogsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='archiveuser', password='password123')
+        self.item = InventoryItem.objects.create(name='Archived', sku='ARC-1', quantity=10, price=1, owner=self.user)
+        now = timezone.now()
+        self.logs = InventoryLog.objects.bulk_create([
+            InventoryLog(
+                item=self.item, user=self.user, action='ADD', quantity_change=1,
+                previous_quantity=i, new_quantity=i + 1, timestamp=now - timedelta(days=days)
+            )
+            for i, days in enumerate([400, 380, 370, 10, 1])
+        ])
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        
+    def read_archives(self):
+        rows = []
+        for name in sorted(os.listdir(self.directory)):
+            with gzip.open(os.path.join(self.directory, name), 'rt') as archive:
+                rows.extend(json.loads(line) for line in archive)
+        return rows
+    
+    def test_moves_old_logs_to_monthly_files(self):
+        build_snapshots()
+        call_command('archive_logs', days=30, output_dir=self.directory, batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(InventoryLog.objects.order_by('timestamp').values_list('id', flat=True)),
+            [log.id for log in self.logs[3:]]
+        )
+        rows = self.read_archives()
+        self.assertEqual([row['id'] for row in rows], [log.id for log in self.logs[:3]])
+        self.assertEqual(rows[0]['item_sku'], 'ARC-1')
+        self.assertEqual(rows[0]['item_owner'], self.user.id)
+        months = {log.timestamp.astimezone(dt_timezone.utc).strftime('%Y-%m') for log in self.logs[:3]}
+        self.assertEqual(set(os.listdir(self.directory)), {f'inventory-logs-{month}.ndjson.gz' for month in months})
+        
+        call_command('archive_logs', days=30, output_dir=self.directory, stdout=StringIO())
+        self.assertEqual(len(self.read_archives()), 3)
+        
+    def test_dry_run_keeps_logs(self):
+        build_snapshots()
+        out = StringIO()
+        call_command('archive_logs', days=30, output_dir=self.directory, dry_run=True, stdout=out)
+        self.assertIn('3 log(s)', out.getvalue())
+        self.assertEqual(InventoryLog.objects.count(), 5)
+        self.assertEqual(os.listdir(self.directory), [])
+        
+    def test_never_archives_days_without_snapshots(self):
+        err = StringIO()
+        call_command('archive_logs', days=30, output_dir=self.directory, stdout=StringIO(), stderr=err)
+        self.assertIn('run build_snapshots', err.getvalue())
+        self.assertEqual(InventoryLog.objects.count(), 5)
+        
+        # Snapshots up to the day of the 380 day old log: the day itself stays
+        build_snapshots(until=timezone.localdate(self.logs[1].timestamp))
+        err = StringIO()
+        call_command('archive_logs', days=30, output_dir=self.directory, stdout=StringIO(), stderr=err)
+        self.assertIn('Snapshots are only built up to', err.getvalue())
+        self.assertEqual([row['id'] for row in self.read_archives()], [self.logs[0].id])
+
+
+
+class StockSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='snapshotuser', password='password123')
+        self.today = timezone.localdate()
+        self.item = InventoryItem.objects.create(name='Ledger', sku='LED-1', quantity=6, price='2.50', owner=self.user)
+        # (days ago, hour, new quantity); the item ends at its current quantity
+        self.history = [(10, 9, 10), (10, 15, 12), (7, 12, 4), (2, 8, 9), (0, 0, 6)]
+        InventoryLog.objects.bulk_create([
+            InventoryLog(
+                item=self.item, user=self.user, action='UPDATE', quantity_change=1, previous_quantity=0,
+                new_quantity=quantity, timestamp=day_start(self.day(days)) + timedelta(hours=hour)
+            )
+            for days, hour, quantity in self.history
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def day(self, days_ago):
+        return self.today - timedelta(days=days_ago)
+    
+    def as_of(self, at):
+        response = self.client.get(reverse('items-as-of', args=[self.item.id]), {'at': at})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['quantity']
+    
+    def test_builds_closing_snapshots_incrementally(self):
+        self.assertEqual(build_snapshots(), 3)
+        self.assertEqual(
+            list(self.item.snapshots.values_list('date', 'quantity', 'value')),
+            [(self.day(10), 12, Decimal('30.00')), (self.day(7), 4, Decimal('10.00')), (self.day(2), 9, Decimal('22.50'))]
+        )
+        # Only the last built day is read again
+        out = StringIO()
+        call_command('build_snapshots', stdout=out)
+        self.assertIn('Wrote 1 snapshot(s)', out.getvalue())
+        self.assertEqual(InventorySnapshot.objects.count(), 3)
+        
+    def test_batches_give_the_same_snapshots(self):
+        build_snapshots()
+        expected = list(InventorySnapshot.objects.order_by('date').values_list('date', 'quantity'))
+        InventorySnapshot.objects.all().delete()
+        # Day 10 spans two batches; the later one writes its closing
+        build_snapshots(batch_size=1)
+        self.assertEqual(list(InventorySnapshot.objects.order_by('date').values_list('date', 'quantity')), expected)
+        
+    def test_as_of_survives_archived_logs(self):
+        build_snapshots()
+        self.assertEqual(self.as_of((day_start(self.day(10)) + timedelta(hours=12)).isoformat()), 10)
+        # Archived days keep their closing quantity
+        InventoryLog.objects.filter(timestamp__lt=day_start(self.day(5))).delete()
+        self.assertEqual(self.as_of(self.day(8).isoformat()), 12)
+        self.assertEqual(self.as_of(self.day(3).isoformat()), 4)
+        self.assertEqual(self.as_of(timezone.now().isoformat()), 6)
+        with self.assertNumQueries(3):
+            self.as_of(self.day(1).isoformat())
+        self.assertIsNone(self.as_of(self.day(11).isoformat()))
+        
+    def test_history_buckets(self):
+        build_snapshots(until=self.day(5))
+        response = self.client.get(
+            reverse('items-history', args=[self.item.id]), {'from': self.day(8), 'to': self.today}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        quantities = [row['quantity'] for row in response.data['results']]
+        # Days after the last snapshot come from the log tail
+        self.assertEqual(quantities, [12, 4, 4, 4, 4, 4, 9, 9, 6])
+        self.assertEqual(response.data['results'][-1]['value'], '15.00')
+        
+        response = self.client.get(
+            reverse('items-history', args=[self.item.id]), {'from': self.day(8), 'to': self.today, 'bucket': 'month'}
+        )
+        self.assertEqual(response.data['results'][-1]['quantity'], 6)
+        self.assertEqual(response.data['results'][-1]['date'], self.today.replace(day=1))
+        
+    def test_invalid_parameters(self):
+        url = reverse('items-history', args=[self.item.id])
+        for params in [{'bucket': 'hour'}, {'from': 'yesterday'}, {'from': self.today, 'to': self.day(1)}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('items-as-of', args=[self.item.id]), {'at': '2024-02-30'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReorderSuggestionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reorderuser', password='password123')
+        self.other = User.objects.create_user(username='otherreorder', password='password123')
+        self.today = timezone.localdate()
+        self.fast = InventoryItem.objects.create(name='Fast', sku='FST-1', quantity=10, price='5.00', owner=self.user)
+        self.stocked = InventoryItem.objects.create(name='Stocked', sku='STK-1', quantity=100, price='5.00', owner=self.user)
+        self.idle = InventoryItem.objects.create(
+            name='Idle', sku='IDL-1', quantity=2, low_stock_threshold=5, price='5.00', owner=self.user
+        )
+        foreign = InventoryItem.objects.create(name='Foreign', sku='FRN-1', quantity=0, price='5.00', owner=self.other)
+        cheap = Supplier.objects.create(name='Cheap Co', owner=self.user)
+        quick = Supplier.objects.create(name='Quick Co', owner=self.user)
+        InventoryItemSupplier.objects.create(item=self.fast, supplier=cheap, supplier_price='2.00', lead_time_days=4)
+        InventoryItemSupplier.objects.create(item=self.fast, supplier=quick, supplier_price='3.00', lead_time_days=1)
+        # Three units a day over the whole window, plus today's which is left out
+        InventoryLog.objects.bulk_create([
+            InventoryLog(
+                item=item, action='REMOVE', quantity_change=3, previous_quantity=0, new_quantity=0,
+                timestamp=day_start(self.today - timedelta(days=days)) + timedelta(hours=12)
+            )
+            for item in [self.fast, self.stocked, foreign]
+            for days in range(31)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+    def test_rates_and_reorder_points(self):
+        analysis = StockAnalysis(InventoryItem.objects.filter(owner=self.user))
+        self.assertEqual(analysis.item_ids.tolist(), [self.fast.id, self.stocked.id, self.idle.id])
+        self.assertEqual(analysis.daily_consumption.tolist(), [3, 3, 0])
+        self.assertEqual(analysis.daily_deviation.tolist(), [0, 0, 0])
+        self.assertEqual(analysis.lead_time.tolist(), [4, 7, 7])
+        # The idle item's threshold is the floor of its reorder point
+        self.assertEqual(analysis.reorder_point.tolist(), [12, 21, 5])
+        self.assertEqual(analysis.reorder_quantity.tolist(), [92, 0, 3])
+        
+    def test_variable_demand_raises_safety_stock(self):
+        InventoryLog.objects.create(
+            item=self.stocked, action='REMOVE', quantity_change=60, previous_quantity=0, new_quantity=0,
+            timestamp=day_start(self.today - timedelta(days=3))
+        )
+        analysis = StockAnalysis(InventoryItem.objects.filter(owner=self.user))
+        self.assertEqual(analysis.daily_consumption[1], 5)
+        self.assertEqual(analysis.recent_consumption[1], 3 + 60 / 7)
+        self.assertGreater(analysis.reorder_point[1], 5 * 7)
+        
+    def test_endpoint(self):
+        response = self.client.get(reverse('items-reorder-suggestions'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([row['id'] for row in results], [self.fast.id, self.idle.id])
+        self.assertEqual(results[0]['days_of_cover'], 3.3)
+        self.assertEqual(results[0]['reorder_quantity'], 92)
+        self.assertEqual(
+            results[0]['supplier'], {'id': results[0]['supplier']['id'], 'name': 'Cheap Co', 'price': '2.00', 'estimated_cost': '184.00'}
+        )
+        self.assertIsNone(results[1]['days_of_cover'])
+        self.assertIsNone(results[1]['supplier'])
+        
+        response = self.client.get(reverse('items-reorder-suggestions'), {'days': 400})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics_registry.reset()
+        self.user = User.objects.create_user(username='metricsuser', password='password123')
+        self.staff = User.objects.create_user(username='metricsstaff', password='password123', is_staff=True)
+        InventoryItem.objects.create(name='Gauge', sku='GAU-1', quantity=4, price='3.00', owner=self.user)
+        self.client = APIClient()
+        
+    def test_records_per_action_metrics(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('items-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        size = len(response.content)
+        self.client.get(reverse('items-low-stock'))
+        
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        view = 'view="InventoryItemViewSet.list"'
+        self.assertIn(f'inventory_requests_total{{{view},method="GET",status="200"}} 1\n', body)
+        self.assertIn(f'inventory_requests_total{{view="InventoryItemViewSet.low_stock",method="GET",status="200"}} 1\n', body)
+        self.assertIn(f'inventory_request_duration_seconds_bucket{{{view},method="GET",le="+Inf"}} 1\n', body)
+        # At least the page count and the page itself
+        queries = re.search(f'inventory_db_queries_sum{{{view}}} (\\d+)\n', body)
+        self.assertGreaterEqual(int(queries.group(1)), 2)
+        self.assertIn(f'inventory_serialization_duration_seconds_count{{{view}}} 1\n', body)
+        self.assertIn(f'inventory_response_size_bytes_sum{{{view}}} {size}\n', body)
+        
+    async def test_async_reads_are_labelled_by_action(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+        with override_settings(ROOT_URLCONF=AsyncReadsURLConf):
+            response = await AsyncClient().get('/api/inventory/items/level/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = metrics_registry.render()
+        view = 'view="InventoryItemViewSet.stock_level"'
+        self.assertIn(f'inventory_requests_total{{{view},method="GET",status="200"}} 1\n', body)
+        self.assertIn(f'inventory_serialization_duration_seconds_count{{{view}}} 1\n', body)
+        # Queries on the sync_to_async threads still count towards the request
+        self.assertIn(f'inventory_db_queries_count{{{view}}} 1\n', body)
+        
+    async def test_counts_queries_of_sync_views_under_asgi(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+        response = await AsyncClient().get(reverse('items-list'), headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        queries = re.search(r'inventory_db_queries_sum{view="InventoryItemViewSet.list"} (\d+)\n', metrics_registry.render())
+        self.assertGreaterEqual(int(queries.group(1)), 2)
+        
+    def test_unknown_methods_share_one_label(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.generic('BREW', reverse('items-list'))
+        self.client.generic('PROPFIND', reverse('items-list'))
+        body = metrics_registry.render()
+        self.assertIn('inventory_requests_total{view="InventoryItemViewSet",method="OTHER",status="405"} 2\n', body)
+        self.assertNotIn('BREW', body)
+        
+    def test_requires_staff_or_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        with override_settings(INVENTORY_METRICS_TOKEN='s3cret'):
+            self.assertEqual(
+                self.client.get('/metrics', headers={'Authorization': 'Token s3cret'}).status_code, status.HTTP_200_OK
+            )
+            self.assertEqual(
+                self.client.get('/metrics', headers={'Authorization': 'Token wrong'}).status_code,
+                status.HTTP_401_UNAUTHORIZED
+            )
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        
+    @override_settings(INVENTORY_QUERY_BUDGET=1)
+    def test_warns_over_query_budget(self):
+        self.client.force_authenticate(user=self.user)
+        with self.assertLogs('inventory.metrics', 'WARNING') as logs:
+            self.client.get(reverse('items-list'))
+        self.assertIn('(InventoryItemViewSet.list) ran', logs.output[0])
+        
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('latency_seconds', 'Latency.', ('view',), (0.1, 1))
+        for value in [0.05, 0.1, 0.5, 3]:
+            histogram.observe(('a"b',), value)
+        self.assertEqual(list(histogram.samples()), [
+            'latency_seconds_bucket{view="a\\"b",le="0.1"} 2',
+            'latency_seconds_bucket{view="a\\"b",le="1.0"} 3',
+            'latency_seconds_bucket{view="a\\"b",le="+Inf"} 4',
+            'latency_seconds_sum{view="a\\"b"} 3.65',
+            'latency_seconds_count{view="a\\"b"} 4',
+        ])
+
+
+class BenchmarkApiTests(TransactionTestCase):
+    def test_reports_every_scenario(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command(
+                'benchmark_api', users=2, categories=2, items=40, suppliers=4, logs=300, requests=6,
+                # The in-memory SQLite test database locks whole tables across threads
+                threads=1 if connection.vendor == 'sqlite' else 3, warmup=1, output=output, stderr=StringIO()
+            )
+            with open(output) as f:
+                report = json.load(f)
+        # Each adjustment, warmup included, adds a log row
+        self.assertEqual(report['dataset'], {'users': 2, 'categories': 2, 'items': 40, 'suppliers': 4, 'logs': 313})
+        self.assertEqual(set(report['scenarios']), {'list', 'search', 'low_stock', 'adjust_quantity', 'log_feed'})
+        for name, runs in report['scenarios'].items():
+            for mode, stats in runs.items():
+                with self.subTest(scenario=name, mode=mode):
+                    self.assertEqual(stats['requests'], 6)
+                    self.assertEqual(stats['errors'], 0)
+                    self.assertGreater(stats['queries_per_request'], 0)
+                    self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        
+        # The dataset is kept for the next run until flushed
+        self.assertEqual(User.objects.filter(username__startswith='benchmark-api-').count(), 2)
+        call_command('benchmark_api', flush=True)
+        self.assertFalse(InventoryItem.objects.filter(sku__startswith='BENCH-API-').exists())
+
+
+@contextmanager
+def stateless_jwt():
+    # Views read DEFAULT_AUTHENTICATION_CLASSES once, when they are defined
+    with override_settings(INVENTORY_STATELESS_JWT=True), \
+            patch.object(APIView, 'authentication_classes', [ClaimsJWTAuthentication]):
+        yield
+
+
+class StatelessJWTTests(TestCase):
+    def setUp(self):
+        user_rows.clear()
+        blacklisted_jtis.clear()
+        self.user = User.objects.create_user(
+            username='claimsuser', password='password123', email='claims@example.com', first_name='Clay'
+        )
+        self.client = APIClient()
+        self.access = str(InventoryRefreshToken.for_user(self.user).access_token)
+        
+    def authenticate(self, token):
+        request = APIClient().get('/').wsgi_request
+        request.META['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+        
+    def test_tokens_carry_user_claims(self):
+        response = self.client.post('/api/token/', {'username': 'claimsuser', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for token in [InventoryRefreshToken(response.data['refresh']), InventoryRefreshToken(response.data['refresh']).access_token]:
+            self.assertEqual((token['username'], token['is_staff']), ('claimsuser', False))
+        
+    def test_authenticates_without_queries(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.access)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.pk, user.username, user.is_staff, user.is_active), (self.user.pk, 'claimsuser', False, True))
+        self.assertEqual(user, self.user)
+        
+        # Tokens issued before the claims existed still authenticate, with a query
+        legacy = RefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            user = self.authenticate(legacy)
+        self.assertNotIsInstance(user, ClaimsUser)
+        
+    def test_other_fields_load_once_from_cached_row(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(self.access).email, 'claims@example.com')
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.access)
+            self.assertEqual((user.email, user.first_name), ('claims@example.com', 'Clay'))
+        
+        self.user.first_name = 'Clayton'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(self.access).first_name, 'Clayton')
+        
+    def test_views_use_claims_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        with stateless_jwt():
+            response = self.client.post(reverse('items-list'), {'name': 'Claimed', 'sku': 'CLM-1', 'quantity': 3, 'price': '2.00'})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.patch(reverse('user-me'), {'last_name': 'Jones'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(InventoryItem.objects.get(sku='CLM-1').owner, self.user)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.email, self.user.last_name), ('claims@example.com', 'Jones'))
+        
+    def test_refresh_restamps_claims(self):
+        refresh = str(InventoryRefreshToken.for_user(self.user))
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.authenticate(response.data['access']).is_staff)
+        
+        # The rotated token was blacklisted, which is now known without a query
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                InventoryRefreshToken(refresh)
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_cached_reads_load_no_user(self):
+        cache.clear()
+        InventoryItem.objects.create(name='Stateless', sku='STL-1', quantity=3, price=2.00, owner=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        with stateless_jwt():
+            for url in [reverse('items-list'), reverse('category-list')]:
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual([query['sql'] for query in queries if 'auth_user' in query['sql']], [])
+        self.assertEqual(len(user_rows), 0)
+        
+    def test_deleted_user_entries_are_orphaned(self):
+        key = response_cache_key('items', 'list', None, self.user, '', get_versions(owner_scope(self.user)))
+        self.user.delete()
+        self.assertNotEqual(
+            response_cache_key('items', 'list', None, self.user, '', get_versions(owner_scope(self.user))), key
+        )
+        
+    def test_ttl_cache_evicts_least_recently_used_and_expired(self):
+        entries = TTLCache(maxsize=2, ttl=60)
+        entries.set('a', 1)
+        entries.set('b', 2)
+        entries.get('a')
+        entries.set('c', 3)
+        self.assertEqual((entries.get('a'), entries.get('b'), entries.get('c')), (1, None, 3))
+        self.assertEqual(len(entries), 2)
+        
+        expired = TTLCache(maxsize=2, ttl=0)
+        expired.set('a', 1)
+        self.assertIsNone(expired.get('a'))
+        self.assertEqual(len(expired), 0)
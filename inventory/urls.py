@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
@@ -12,6 +13,39 @@ router.register(r'item-suppliers', views.InventoryItemSupplierViewSet, basename=
 
 
 urlpatterns = [
+    path('cache-stats/', views.CacheStatsView.as_view(), name='cache-stats'),
+    path('events/', views.stock_events, name='events'),
     path('', include(router.urls)),
     path('api/inventory/', include(router.urls)),
-]
\ No newline at end of file
+]
+
+
+def async_read_urlpatterns():
+    """
+    Async views for the hot reads, placed in front of the router's routes and
+    handing anything they don't serve back to the matching viewset view.
+    """
+    from . import async_views
+    
+    sync_views = {pattern.name: pattern.callback for pattern in router.urls}
+    return [
+        path(
+            'items/',
+            async_views.async_read_view(async_views.item_list, sync_views['items-list'], {'page', 'page_size'})
+        ),
+        path('items/level/', async_views.async_read_view(async_views.stock_level, sync_views['items-stock-level'])),
+        path('items/low-stock/', async_views.async_read_view(async_views.low_stock, sync_views['items-low-stock'])),
+        path('items/<int:pk>/', async_views.async_read_view(async_views.item_detail, sync_views['items-detail'])),
+        path(
+            'items/<int:pk>/level/',
+            async_views.async_read_view(async_views.item_stock_level, sync_views['items-item-stock-level'])
+        ),
+        path(
+            'logs/',
+            async_views.async_read_view(async_views.log_list, sync_views['logs-list'], {'cursor', 'ordering', 'page_size'})
+        ),
+    ]
+
+
+if settings.INVENTORY_ASYNC_READS:
+    urlpatterns = async_read_urlpatterns() + urlpatterns
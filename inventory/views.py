@@ -1,4 +1,6 @@
-from django.db import models
+import io
+from datetime import timedelta
+from django.db import models, transaction
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from django.contrib.auth.models import User
@@ -6,18 +8,43 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from .serializers import (
     UserSerializer, CategorySerializer, InventoryItemSerializer, InventoryLogSerializer, 
     SupplierSerializer, InventoryItemSupplierSerializer, InventoryItemCreateUpdateSerializer, InventoryLevelSerializer,
-    LoginSerializer
+    LoginSerializer, BulkAdjustmentSerializer, InventoryItemTombstoneSerializer
+)
+from .models import (
+    Category, InventoryItem, InventoryItemTombstone, Supplier, InventoryLog, InventoryItemSupplier, StockStatus,
+    sync_low_stock_alerts, invalidate_item_caches, publish_log_events, ClaimsUser
 )
-from .models import Category, InventoryItem, Supplier, InventoryLog, InventoryItemSupplier
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .permissions import IsOwnerOrReadOnly, IsOwner
+from .permissions import HasMetricsToken, IsOwnerOrReadOnly, IsOwner
 from .filters import InventoryItemFilter
+from .imports import IMPORT_FORMATS, detect_format, import_items
+from .exports import EXPORT_FORMATS, ITEM_EXPORT_FIELDS, LOG_EXPORT_FIELDS, export_response
+from .pagination import KeysetPagination
+from .search import InventorySearchFilter
+from .analytics import StockAnalysis, parse_window_days
+from .snapshots import parse_day, parse_moment, quantity_as_of, stock_history
+from .sync import SYNC_PAGE_SIZE, get_changes
+from .cache import CachedResponseMixin, cache_stats, get_versions, owner_scope
+from .conditional import ConditionalRequestMixin
+from .compiled import CompiledListMixin
+from .metrics import registry as metrics_registry
+from django.conf import settings
+from django.core.cache import cache
+from decimal import Decimal
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.utils import timezone
 
 
 from rest_framework.views import APIView
+from rest_framework.exceptions import AuthenticationFailed
+from .authentication import InventoryRefreshToken, jwt_authentication
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from .events import ALL_CHANNEL, event_stream, get_broker, owner_channel
+
+SUMMARY_CACHE_TIMEOUT = 60 * 60
 
 class IndexView(APIView):
     permission_classes = [AllowAny]
@@ -38,6 +65,52 @@ class IndexView(APIView):
         return Response(data)
 
 
+class CacheStatsView(APIView):
+    """
+    Hit/miss counters of the response cache for this process
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(cache_stats.snapshot())
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of this process in the Prometheus text format
+    """
+    permission_classes = [HasMetricsToken | IsAdminUser]
+    
+    def get(self, request):
+        return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def authenticate_stream(request):
+    try:
+        result = jwt_authentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if result is not None:
+        return result[0]
+    return request.user if request.user.is_authenticated else None
+
+
+@require_GET
+async def stock_events(request):
+    """
+    Server-Sent Events stream of the user's inventory log entries and low stock
+    transitions (every owner's for staff). Meant to be served under ASGI.
+    """
+    user = await sync_to_async(authenticate_stream)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    channels = [ALL_CHANNEL] if user.is_staff else [owner_channel(user.id)]
+    response = StreamingHttpResponse(event_stream(get_broker(), channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -62,6 +135,9 @@ class UserViewSet(viewsets.ModelViewSet):
     def me(self, request):
         user = request.user
         if request.method in ['PUT', 'PATCH']:
+            if isinstance(user, ClaimsUser):
+                # Never write back fields filled in from the cached row
+                user = User.objects.get(pk=user.pk)
             serializer = self.get_serializer(user, data=request.data, partial=(request.method == 'PATCH'))
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -78,7 +154,7 @@ class UserViewSet(viewsets.ModelViewSet):
         user = authenticate(username=username, password=password)
         
         if user is not None:
-            refresh = RefreshToken.for_user(user)
+            refresh = InventoryRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -97,61 +173,167 @@ class UserViewSet(viewsets.ModelViewSet):
     def logout(self, request):
         refresh_token = request.data.get('refresh_token')
         try:
-            token = RefreshToken(refresh_token)
+            token = InventoryRefreshToken(refresh_token)
             token.blacklist()
             return Response({'message': 'Successfully logged out'}, status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
             return Response({'error': 'Invalid token or user already logged out'}, status=status.HTTP_400_BAD_REQUEST)
        
        
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalRequestMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend,filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
+    last_modified_field = 'updated_at'
     
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy']:
             return [IsAuthenticated(), IsAdminUser()] 
         return [IsAuthenticated()]
     
+    def get_cache_scopes(self):
+        return ['categories']
+    
 
-class InventoryItemViewSet(viewsets.ModelViewSet):
+class InventoryItemViewSet(ConditionalRequestMixin, CachedResponseMixin, CompiledListMixin, viewsets.ModelViewSet):
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, InventorySearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description', 'category__name', 'sku']
     filterset_class = InventoryItemFilter
-    ordering_fields = ['name', 'quantity', 'price', 'date_added', 'last_updated']
+    ordering_fields = ['name', 'quantity', 'price', 'stock_status', 'date_added', 'last_updated']
+    conditional_list_actions = ('list', 'stock_level')
+    conditional_detail_actions = ('retrieve', 'item_stock_level', 'update', 'partial_update')
+    conditional_detail_scopes = ('categories', 'suppliers')
     
     def get_queryset(self):
         user = self.request.user
-        if user.is_staff:
-            return super().get_queryset()
-        return super().get_queryset().filter(owner=user)
+        queryset = super().get_queryset()
+        if not user.is_staff:
+            queryset = queryset.filter(owner=user)
+        return self.setup_eager_loading(queryset)
+    
+    def get_cache_scopes(self):
+        return [owner_scope(self.request.user), 'categories', 'suppliers']
+    
+    def setup_eager_loading(self, queryset):
+        """
+        Shape the queryset for the serializer used by the current action so that
+        related rows are fetched up front instead of once per item.
+        """
+        if self.action in ('history', 'as_of', 'reorder_suggestions'):
+            # These read the item's own columns and nothing related
+            return queryset
+        serializer_class = self.get_serializer_class()
+        fields = self.get_serializer_fields()
+        if fields is not None:
+            return serializer_class.setup_eager_loading(queryset, fields)
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            return serializer_class.setup_eager_loading(queryset)
+        return queryset
+    
+    def get_serializer_fields(self):
+        """
+        The sparse fieldset from ?fields= and ?expand=, when the action's
+        serializer supports one.
+        """
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'get_sparse_fields'):
+            return serializer_class.get_sparse_fields(self.request.query_params)
+        return None
+    
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_serializer_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
      
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return InventoryItemCreateUpdateSerializer
+        if self.action in ['stock_level', 'item_stock_level']:
+            return InventoryLevelSerializer
         return InventoryItemSerializer
     
     @action(detail=False, methods=['get'], url_path='level')
     def stock_level(self, request):
-        queryset = self.get_queryset()
-        serializer = InventoryLevelSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(self.get_compiled_serializer().data(self.get_queryset()))
     
     @action(detail=False, methods=['get'], url_path='low-stock')
     def low_stock(self, request):
         """
         List all items that are low in stock
         """
-        low_stock_items = self.get_queryset().filter(quantity__lt=models.F('low_stock_threshold'))
-        serializer = self.get_serializer(low_stock_items, many=True)
-        return Response(serializer.data)
+        low_stock_items = self.get_queryset().filter(stock_status__lte=StockStatus.LOW)
+        return Response(self.get_compiled_serializer().data(low_stock_items))
+    
+    @action(detail=False, methods=['get'], url_path='summary')
+    def summary(self, request):
+        """
+        Totals and per-category breakdown of the user's inventory, computed in
+        one grouped query and cached until the user's items change
+        """
+        scope = owner_scope(request.user)
+        versions = get_versions(scope, 'categories')
+        cache_key = f"inventory:summary:{scope}:{':'.join(map(str, versions))}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.build_summary(self.get_queryset())
+            cache.set(cache_key, data, SUMMARY_CACHE_TIMEOUT)
+        return Response(data)
+    
+    @action(detail=False, methods=['get'], url_path='reorder-suggestions')
+    def reorder_suggestions(self, request):
+        """
+        Items at or below their reorder point, worked out from the consumption
+        of the last ?days= days (30 by default), those running out soonest first
+        """
+        days = parse_window_days(request.query_params.get('days'))
+        suggestions = StockAnalysis(self.filter_queryset(self.get_queryset()), days).suggestions()
+        page = self.paginate_queryset(suggestions)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(suggestions)
+    
+    @staticmethod
+    def build_summary(queryset):
+        value = models.ExpressionWrapper(
+            models.F('quantity') * models.F('price'),
+            output_field=models.DecimalField(max_digits=20, decimal_places=2)
+        )
+        rows = queryset.prefetch_related(None).order_by().values('category', 'category__name').annotate(
+            item_count=models.Count('id'),
+            total_quantity=models.Sum('quantity'),
+            total_value=models.Sum(value),
+            low_stock_count=models.Count('id', filter=models.Q(stock_status=StockStatus.LOW)),
+            out_of_stock_count=models.Count('id', filter=models.Q(stock_status=StockStatus.OUT)),
+        ).order_by('category__name')
+        
+        counters = ['item_count', 'total_quantity', 'low_stock_count', 'out_of_stock_count']
+        totals = dict.fromkeys(counters, 0)
+        total_value = Decimal('0')
+        categories = []
+        for row in rows:
+            row_value = row['total_value'] or Decimal('0')
+            total_value += row_value
+            for counter in counters:
+                totals[counter] += row[counter] or 0
+            categories.append({
+                'category': row['category'],
+                'category_name': row['category__name'],
+                'item_count': row['item_count'],
+                'total_quantity': row['total_quantity'] or 0,
+                'total_value': str(row_value.quantize(Decimal('0.01'))),
+                'low_stock_count': row['low_stock_count'],
+                'out_of_stock_count': row['out_of_stock_count'],
+            })
+        totals['total_value'] = str(total_value.quantize(Decimal('0.01')))
+        totals['categories'] = categories
+        return totals
     
     @action(detail=True, methods=['get'], url_path='level')
     def item_stock_level(self, request, pk=None):
@@ -159,6 +341,40 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         serializer = InventoryLevelSerializer(item)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        Closing stock per day, week or month (?from=&to=&bucket=), the last 30
+        days by default
+        """
+        item = self.get_object()
+        end = parse_day(request.query_params.get('to'), 'to', timezone.localdate())
+        start = parse_day(request.query_params.get('from'), 'from', end - timedelta(days=29))
+        bucket = request.query_params.get('bucket', 'day')
+        return Response({
+            'item': item.id,
+            'bucket': bucket,
+            'results': stock_history(item, start, end, bucket),
+        })
+    
+    @action(detail=True, methods=['get'], url_path='as-of')
+    def as_of(self, request, pk=None):
+        """
+        The item's stock at a past moment (?at=<ISO date or datetime>; a date
+        means the end of that day)
+        """
+        item = self.get_object()
+        moment = parse_moment(request.query_params.get('at'), 'at')
+        quantity = quantity_as_of(item, moment)
+        return Response({
+            'item': item.id,
+            'sku': item.sku,
+            'at': moment,
+            'quantity': quantity,
+            'value': None if quantity is None else str((quantity * item.price).quantize(Decimal('0.01'))),
+        })
+    
+    @transaction.atomic
     def perform_create(self, serializer):
         new_item = serializer.save(owner=self.request.user)
         InventoryLog.objects.create(
@@ -171,6 +387,7 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
             notes=f"New item  '{new_item.name}' added with quantity {new_item.quantity} by {self.request.user.username}"
         )
              
+    @transaction.atomic
     def perform_update(self, serializer):
         instance = self.get_object()
         old_quantity = instance.quantity
@@ -208,32 +425,162 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        old_quantity = item.quantity
-        new_quantity = max(0, old_quantity + quantity_change)
         if quantity_change > 0:
             action = 'ADD'
         else:
             action = 'REMOVE'
-            quantity_change = abs(quantity_change)  
-        
-        item.quantity = new_quantity
-        item.save()
         
-        log = InventoryLog.objects.create(
-            item=item,
-            user=self.request.user,
-            action=action,
-            quantity_change=quantity_change,
-            previous_quantity=old_quantity,
-            new_quantity=new_quantity,
-            notes=f"Quantity updated from {old_quantity} to {new_quantity} by {self.request.user.username}"
-        )
+        with transaction.atomic():
+            # Lock the row and re-read the quantity so concurrent adjustments queue up
+            # instead of overwriting each other.
+            old_quantity = InventoryItem.objects.select_for_update().values_list('quantity', flat=True).get(pk=item.pk)
+            new_quantity = max(0, old_quantity + quantity_change)
+            
+            item.quantity = new_quantity
+            item.save(update_fields=['quantity', 'last_updated'])
+            
+            log = InventoryLog.objects.create(
+                item=item,
+                user=self.request.user,
+                action=action,
+                quantity_change=abs(quantity_change),
+                previous_quantity=old_quantity,
+                new_quantity=new_quantity,
+                notes=f"Quantity updated from {old_quantity} to {new_quantity} by {self.request.user.username}"
+            )
         
         return Response({
             'item': InventoryItemSerializer(item).data,
             'log': InventoryLogSerializer(log).data
         })
-                         
+    
+    @action(detail=False, methods=['post'], url_path='bulk-adjust')
+    def bulk_adjust(self, request):
+        """
+        Apply a list of quantity adjustments, keyed by id or sku, in one transaction
+        """
+        serializer = BulkAdjustmentSerializer(
+            data=request.data, many=True, max_length=settings.INVENTORY_MAX_BULK_ADJUSTMENTS
+        )
+        serializer.is_valid(raise_exception=True)
+        adjustments = serializer.validated_data
+        
+        ids = {row['id'] for row in adjustments if 'id' in row}
+        skus = {row['sku'] for row in adjustments if 'id' not in row}
+        
+        with transaction.atomic():
+            queryset = InventoryItem.objects.select_for_update().filter(
+                models.Q(id__in=ids) | models.Q(sku__in=skus)
+            ).only('id', 'name', 'sku', 'quantity', 'low_stock_threshold', 'owner').order_by('id')
+            if not request.user.is_staff:
+                queryset = queryset.filter(owner=request.user)
+            items = list(queryset)
+            by_id = {item.id: item for item in items}
+            by_sku = {item.sku: item for item in items if item.sku}
+            
+            now = timezone.now()
+            results = []
+            logs = []
+            changed = {}
+            for index, row in enumerate(adjustments):
+                item = by_id.get(row['id']) if 'id' in row else by_sku.get(row['sku'])
+                if item is None:
+                    results.append({
+                        'index': index,
+                        'status': 'error',
+                        'error': 'Inventory item not found or you do not own it'
+                    })
+                    continue
+                
+                quantity_change = row['quantity_change']
+                old_quantity = item.quantity
+                new_quantity = max(0, old_quantity + quantity_change)
+                item.quantity = new_quantity
+                item.last_updated = now
+                changed[item.id] = item
+                logs.append(InventoryLog(
+                    item=item,
+                    user=request.user,
+                    action='ADD' if quantity_change > 0 else 'REMOVE',
+                    quantity_change=abs(quantity_change),
+                    previous_quantity=old_quantity,
+                    new_quantity=new_quantity,
+                    timestamp=now,
+                    notes=row.get('notes') or f"Quantity updated from {old_quantity} to {new_quantity} by {request.user.username}"
+                ))
+                results.append({
+                    'index': index,
+                    'status': 'ok',
+                    'id': item.id,
+                    'sku': item.sku,
+                    'previous_quantity': old_quantity,
+                    'new_quantity': new_quantity
+                })
+            
+            InventoryItem.objects.bulk_update(changed.values(), ['quantity', 'last_updated'], batch_size=500)
+            InventoryLog.objects.bulk_create(logs, batch_size=500)
+            publish_log_events(logs)
+            sync_low_stock_alerts(changed.values())
+            invalidate_item_caches(item.owner_id for item in changed.values())
+        
+        log_ids = iter(log.id for log in logs)
+        for result in results:
+            if result['status'] == 'ok':
+                result['log'] = next(log_ids)
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Upsert items keyed by SKU from an uploaded CSV or JSON Lines file
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "A CSV or JSON Lines file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('type') or detect_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {"error": f"type must be one of {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = import_items(stream, file_format, request.user)
+        return Response(result)
+    
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream the filtered item list as CSV or NDJSON (?type=csv|ndjson)
+        """
+        export_format = request.query_params.get('type', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"type must be one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(queryset, ITEM_EXPORT_FIELDS, export_format, 'items')
+    
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Items created or updated and items deleted since the `since` token of a
+        previous sync. Keep requesting with the returned `next` token while
+        `has_more` is true.
+        """
+        tombstones = InventoryItemTombstone.objects.all()
+        if not request.user.is_staff:
+            tombstones = tombstones.filter(owner=request.user)
+        changed, deleted, next_token, has_more = get_changes(
+            self.get_queryset(), tombstones, request.query_params.get('since'), SYNC_PAGE_SIZE
+        )
+        return Response({
+            'changed': self.get_serializer(changed, many=True).data,
+            'deleted': InventoryItemTombstoneSerializer(deleted, many=True).data,
+            'next': next_token,
+            'has_more': has_more,
+        })
 
 
 class InventoryLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -242,13 +589,15 @@ class InventoryLogViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['item', 'user', 'action']
-    ordering_fields = ['timestamp', 'item__name']
+    ordering_fields = ['timestamp']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
+        queryset = InventoryLog.objects.select_related('item', 'user')
         if user.is_staff:
-            return InventoryLog.objects.all()
-        return InventoryLog.objects.filter(item__owner=user) 
+            return queryset
+        return queryset.filter(item__owner=user) 
     
     @action(detail=True, methods=['get'] , url_path='item')
     def item_log(self, request, pk=None):
@@ -262,9 +611,24 @@ class InventoryLogViewSet(viewsets.ReadOnlyModelViewSet):
         except InventoryItem.DoesNotExist:
             return Response({'error': 'Inventory item not found or you do not own it'}, status=status.HTTP_404_NOT_FOUND)
         
-        logs = self.get_queryset().filter(item=item)
-        serializer = self.get_serializer(logs, many=True)
-        return Response(serializer.data)            
+        logs = self.filter_queryset(self.get_queryset().filter(item=item))
+        page = self.paginate_queryset(logs)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream the filtered log feed as CSV or NDJSON (?type=csv|ndjson)
+        """
+        export_format = request.query_params.get('type', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"type must be one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(queryset, LOG_EXPORT_FIELDS, export_format, 'inventory-logs')            
 
 
 class SupplierViewSet(viewsets.ModelViewSet):
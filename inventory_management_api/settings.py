@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'inventory.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -122,6 +123,38 @@ DATABASES = {
 # }
 
 
+# Cache
+# Summaries and responses are cached per user; use a shared backend (e.g. Redis or
+# a file/database cache) when running more than one process.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='inventory-api'),
+    }
+}
+
+# Pub/sub behind the events/ stream: inventory.events.InMemoryBroker for a
+# single process, inventory.events.PostgresBroker to fan out across workers
+INVENTORY_EVENT_BROKER = config('INVENTORY_EVENT_BROKER', default='inventory.events.InMemoryBroker')
+
+# Serve the hot item and log reads from async views when running under ASGI
+INVENTORY_ASYNC_READS = config('INVENTORY_ASYNC_READS', default=False, cast=bool)
+
+# Log a warning for requests running more database queries than this (0 = off)
+INVENTORY_QUERY_BUDGET = config('INVENTORY_QUERY_BUDGET', default=0, cast=int)
+
+# Lets Prometheus scrape /metrics with `Authorization: Token <token>`; staff
+# users can always read it
+INVENTORY_METRICS_TOKEN = config('INVENTORY_METRICS_TOKEN', default='')
+
+# Authenticate JWT requests from the token claims instead of a User query;
+# full User rows and blacklisted refresh token JTIs are kept per process in
+# LRU caches of this many entries for this many seconds
+INVENTORY_STATELESS_JWT = config('INVENTORY_STATELESS_JWT', default=False, cast=bool)
+INVENTORY_AUTH_CACHE_SIZE = config('INVENTORY_AUTH_CACHE_SIZE', default=10000, cast=int)
+INVENTORY_AUTH_CACHE_TTL = config('INVENTORY_AUTH_CACHE_TTL', default=300, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -173,8 +206,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10,
+    'DEFAULT_PAGINATION_CLASS': 'inventory.pagination.PageSizePagination',
+    'PAGE_SIZE': config('PAGE_SIZE', default=10, cast=int),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -182,6 +215,30 @@ REST_FRAMEWORK = {
     ],
 }
 
+if INVENTORY_STATELESS_JWT:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = (
+        'inventory.authentication.ClaimsJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    )
+
+# Upper bound for the ?page_size= clients can ask for
+INVENTORY_MAX_PAGE_SIZE = config('INVENTORY_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Most adjustments items/bulk-adjust/ locks and applies in one request
+INVENTORY_MAX_BULK_ADJUSTMENTS = config('INVENTORY_MAX_BULK_ADJUSTMENTS', default=1000, cast=int)
+
+# Encode and decode JSON with orjson (pip install orjson); output is identical
+if config('ORJSON_RENDERER', default=False, cast=bool):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'inventory.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'inventory.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=2),
@@ -197,10 +254,12 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_BLACKLIST_ENABLED': True,
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'inventory.authentication.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'inventory.authentication.TokenRefreshSerializer',
 }
 
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True